@@ -0,0 +1,187 @@
+"""Offline funnel analytics over the submission collections.
+
+    python analytics.py applications --weeks 12
+    python analytics.py signups
+    python analytics.py response-times
+
+Collections are pulled in large projected batches into DataFrames and cached
+locally together with their created_at high-water mark, so a rerun only
+fetches documents written since the previous run (plus a short overlap for
+late commits, deduplicated by id). Report outputs are cached
+by that same mark and reused untouched when nothing new has arrived.
+"""
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import typer
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+CACHE_DIR = Path(os.environ.get('ANALYTICS_CACHE_DIR', ROOT_DIR / '.analytics_cache'))
+TRACE_DIR = Path(os.environ.get('TRACE_DIR', ROOT_DIR / 'traces'))
+FETCH_BATCH_SIZE = 5000
+# Writes can commit out of created_at order (several workers, the resume pool),
+# so each incremental fetch re-reads this much before the mark and dedupes by id
+WATERMARK_OVERLAP = pd.Timedelta(os.environ.get('ANALYTICS_WATERMARK_OVERLAP', '10min'))
+
+app = typer.Typer(help="Funnel reports over contact messages, applications and signups")
+
+
+def get_db():
+    client = MongoClient(os.environ['MONGO_URL'])
+    return client[os.environ['DB_NAME']]
+
+
+def load_frame(collection: str, fields: List[str]) -> pd.DataFrame:
+    """Return all documents of a collection as a DataFrame, fetching only what's new"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    frame_path = CACHE_DIR / f"{collection}.pkl"
+    columns = sorted(set(fields) | {"created_at", "id"})
+
+    cached: Optional[pd.DataFrame] = None
+    if frame_path.exists():
+        cached = pd.read_pickle(frame_path)
+        if not set(columns) <= set(cached.columns):
+            cached = None  # projection changed, start over
+
+    query = {}
+    if cached is not None and len(cached):
+        since = pd.Timestamp(high_water_mark(cached)) - WATERMARK_OVERLAP
+        query = {"created_at": {"$gt": since.isoformat()}}
+
+    cursor = get_db()[collection].find(
+        query, {"_id": 0, **{field: 1 for field in columns}}, batch_size=FETCH_BATCH_SIZE
+    )
+    chunks = []
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= FETCH_BATCH_SIZE:
+            chunks.append(pd.DataFrame.from_records(batch, columns=columns))
+            batch = []
+    if batch:
+        chunks.append(pd.DataFrame.from_records(batch, columns=columns))
+
+    if not chunks:
+        return cached if cached is not None else pd.DataFrame(columns=columns)
+
+    fresh = pd.concat(chunks, ignore_index=True)
+    # The API writes created_at as an ISO string; keep it as one for the $gt query
+    fresh["created_at"] = pd.to_datetime(fresh["created_at"], utc=True, format="ISO8601").map(pd.Timestamp.isoformat)
+    frame = fresh if cached is None else pd.concat([cached, fresh], ignore_index=True)
+    # The overlap window re-reads documents already cached
+    frame = frame[~(frame["id"].notna() & frame.duplicated("id", keep="last"))].reset_index(drop=True)
+    frame.to_pickle(frame_path)
+    return frame
+
+
+def high_water_mark(frame: pd.DataFrame) -> str:
+    return frame["created_at"].max() if len(frame) else ""
+
+
+def cached_report(name: str, frame: pd.DataFrame, build) -> pd.DataFrame:
+    """Reuse a report computed at the same high-water mark, or build and store it"""
+    key = f"{name}-{len(frame)}-{high_water_mark(frame)}".replace(":", "").replace("+", "")
+    path = CACHE_DIR / "reports" / f"{key}.pkl"
+    if path.exists():
+        return pd.read_pickle(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for stale in path.parent.glob(f"{name}-*.pkl"):
+        stale.unlink()
+    report = build(frame)
+    report.to_pickle(path)
+    return report
+
+
+def week_of(created_at: pd.Series) -> pd.Series:
+    timestamps = pd.to_datetime(created_at, utc=True, format="ISO8601")
+    return timestamps.dt.tz_localize(None).dt.to_period("W-SUN").dt.start_time.dt.date
+
+
+def emit(report: pd.DataFrame, output: Optional[Path]):
+    if output is not None:
+        report.to_csv(output)
+        typer.echo(f"Wrote {len(report)} rows to {output}")
+    else:
+        typer.echo(report.to_string())
+
+
+@app.command()
+def applications(
+    weeks: int = typer.Option(12, help="Number of most recent weeks to show"),
+    output: Optional[Path] = typer.Option(None, help="Write the report to this CSV file"),
+):
+    """Job applications per position per week."""
+    frame = load_frame("job_applications", ["position"])
+
+    def build(df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            return pd.DataFrame()
+        pivot = pd.crosstab(week_of(df["created_at"]), df["position"].fillna("Unknown"))
+        pivot.index.name = "week"
+        pivot["total"] = pivot.sum(axis=1)
+        return pivot
+
+    emit(cached_report("applications", frame, build).tail(weeks), output)
+
+
+@app.command()
+def signups(
+    output: Optional[Path] = typer.Option(None, help="Write the report to this CSV file"),
+):
+    """Newsletter signup cohorts by week, with cumulative growth."""
+    frame = load_frame("newsletters", ["email"])
+
+    def build(df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            return pd.DataFrame()
+        domains = df["email"].str.lower().str.rsplit("@", n=1).str[-1]
+        cohorts = pd.DataFrame({"week": week_of(df["created_at"]), "domain": domains})
+        report = cohorts.groupby("week").agg(signups=("domain", "size"), distinct_domains=("domain", "nunique"))
+        report["cumulative"] = report["signups"].cumsum()
+        report["growth_pct"] = (report["signups"] / report["cumulative"].shift(1) * 100).round(2)
+        return report
+
+    emit(cached_report("signups", frame, build), output)
+
+
+@app.command("response-times")
+def response_times(
+    trace_dir: Path = typer.Option(TRACE_DIR, help="Directory holding exported spans-*.jsonl files"),
+    output: Optional[Path] = typer.Option(None, help="Write the report to this CSV file"),
+):
+    """Per-route API latency distribution from exported trace root spans."""
+    records = []
+    for path in sorted(trace_dir.glob("spans-*.jsonl*")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                span = json.loads(line)
+                if not span.get("parentSpanId"):
+                    records.append((span["attributes"].get("http.route", span["name"]), span["durationMs"]))
+    if not records:
+        typer.echo(f"No root spans found in {trace_dir} (is TRACE_SAMPLE_RATE set?)")
+        raise typer.Exit(1)
+
+    frame = pd.DataFrame.from_records(records, columns=["route", "duration_ms"])
+    grouped = frame.groupby("route")["duration_ms"]
+    report = grouped.quantile([0.5, 0.9, 0.99]).unstack()
+    report.columns = ["p50_ms", "p90_ms", "p99_ms"]
+    report.insert(0, "requests", grouped.size())
+    report["mean_ms"] = grouped.mean()
+    report["max_ms"] = grouped.max()
+    # Share of requests within common latency budgets
+    for budget in (100, 500, 1000):
+        within = pd.Series(np.less_equal(frame["duration_ms"].to_numpy(), budget), index=frame.index)
+        report[f"le_{budget}ms_pct"] = within.groupby(frame["route"]).mean() * 100
+    emit(report.round(2).sort_values("requests", ascending=False), output)
+
+
+if __name__ == "__main__":
+    app()
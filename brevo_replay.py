@@ -0,0 +1,71 @@
+"""Replay recorded Brevo webhook events against a local instance.
+
+Stands in for Brevo when exercising POST /api/webhooks/brevo:
+
+    python brevo_replay.py --token $BREVO_WEBHOOK_TOKEN                  # fixture as one batch
+    python brevo_replay.py --single                                       # one request per event
+    python brevo_replay.py --repeat 200 --batch-size 500 --concurrency 8  # burst test
+"""
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+import requests
+import typer
+
+ROOT_DIR = Path(__file__).parent
+DEFAULT_FIXTURE = ROOT_DIR / 'fixtures' / 'brevo_events.json'
+
+
+def load_events(fixture: Path, repeat: int) -> List[dict]:
+    events = json.loads(fixture.read_text(encoding="utf-8"))
+    if repeat <= 1:
+        return events
+    expanded = []
+    for i in range(repeat):
+        for event in events:
+            copy = dict(event)
+            # Distinct message ids so repeated copies look like separate sends
+            if "message-id" in copy:
+                copy["message-id"] = f"<{uuid.uuid4().hex}.{i}@smtp-relay.mailin.fr>"
+            expanded.append(copy)
+    return expanded
+
+
+def main(
+    url: str = typer.Option("http://localhost:8000/api/webhooks/brevo", help="Webhook endpoint"),
+    token: str = typer.Option("", envvar="BREVO_WEBHOOK_TOKEN", help="Webhook token"),
+    fixture: Path = typer.Option(DEFAULT_FIXTURE, help="JSON array of Brevo events"),
+    repeat: int = typer.Option(1, help="Replay the fixture this many times"),
+    batch_size: int = typer.Option(100, help="Events per request when batching"),
+    single: bool = typer.Option(False, help="Send each event as its own request, like unbatched Brevo"),
+    concurrency: int = typer.Option(4, help="Concurrent requests in flight"),
+):
+    events = load_events(fixture, repeat)
+    if single:
+        bodies = events
+    else:
+        bodies = [events[i:i + batch_size] for i in range(0, len(events), batch_size)]
+
+    session = requests.Session()
+
+    def send(body) -> int:
+        return session.post(url, params={"token": token}, json=body, timeout=30).status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(send, bodies))
+    elapsed = time.perf_counter() - started
+
+    summary = {}
+    for status in statuses:
+        summary[status] = summary.get(status, 0) + 1
+    typer.echo(f"Sent {len(events)} events in {len(bodies)} requests in {elapsed:.2f}s "
+               f"({len(events) / elapsed:.0f} events/s); responses: {summary}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,166 @@
+"""Event-loop lag monitor and blocking-call detector.
+
+A probe task sleeps for a fixed interval and records how late it wakes up;
+that lateness is time the loop spent unable to run anything else. A watchdog
+thread watches the probe's heartbeat and, when it goes stale, samples the
+loop thread's stack while the blocking call is still on it, so the log names
+the offending line and the route whose handler made the call.
+
+Tests can assert that a block of code never stalls the loop:
+
+    with loop_monitor.measure() as window:
+        await client.post("/api/contact", json=payload)
+    assert window.max_block_ms < 50
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class BlockWindow:
+    """Largest loop stall seen while a measure() block was open"""
+
+    def __init__(self):
+        self.max_block_ms = 0.0
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.05, threshold_ms: float = 100.0, stack_depth: int = 20):
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self.stack_depth = stack_depth
+        self.buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.samples = 0
+        self.total_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.stalls = 0
+        self.routes: Dict[str, dict] = {}
+        self._route_codes: Dict[object, str] = {}
+        self._windows: set = set()
+        self._beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        # (heartbeat it belongs to, route, formatted stack), set by the watchdog
+        self._stall: Optional[tuple] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self, routes: Iterable = (), asyncio_debug: bool = False) -> asyncio.Task:
+        """Start the watchdog thread; returns the probe task (call from the loop thread)"""
+        if asyncio_debug:
+            # asyncio's own slow-callback warnings, with the callback's creation
+            # traceback; costly, so only for local debugging
+            loop = asyncio.get_running_loop()
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold_ms / 1000
+        self._route_codes = {
+            route.endpoint.__code__: route.path for route in routes if hasattr(route, "endpoint")
+        }
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        return asyncio.create_task(self.run())
+
+    def stop(self):
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._observe(max(now - expected, 0.0) * 1000, self._beat)
+            self._beat = now
+
+    def _observe(self, lag_ms: float, beat: float):
+        self.samples += 1
+        self.total_lag_ms += lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        bucket = 0
+        while bucket < len(LAG_BUCKETS_MS) and lag_ms > LAG_BUCKETS_MS[bucket]:
+            bucket += 1
+        self.buckets[bucket] += 1
+        for window in self._windows:
+            window.max_block_ms = max(window.max_block_ms, lag_ms)
+        if lag_ms < self.threshold_ms:
+            return
+
+        self.stalls += 1
+        stall = self._stall
+        route, stack = (stall[1], stall[2]) if stall and stall[0] == beat else ("unknown", None)
+        counters = self.routes.setdefault(route, {"stalls": 0, "blocked_ms": 0.0, "max_ms": 0.0})
+        counters["stalls"] += 1
+        counters["blocked_ms"] += lag_ms
+        counters["max_ms"] = max(counters["max_ms"], lag_ms)
+        logger.warning(
+            "Event loop blocked for %.0fms in %s", lag_ms, route,
+            extra={"fields": {"blocked_ms": round(lag_ms, 1), "route": route, "stack": stack}},
+        )
+
+    def _watch(self):
+        check_every = max(self.threshold_ms / 2000, 0.005)
+        while not self._stop.wait(check_every):
+            beat = self._beat
+            stalled_ms = (time.monotonic() - beat - self.interval) * 1000
+            if stalled_ms < self.threshold_ms or (self._stall and self._stall[0] == beat):
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._stall = (beat, self._route_of(frame), self._format_stack(frame))
+
+    def _route_of(self, frame) -> str:
+        while frame is not None:
+            route = self._route_codes.get(frame.f_code)
+            if route is not None:
+                return route
+            frame = frame.f_back
+        return "unknown"
+
+    def _format_stack(self, frame) -> str:
+        return "".join(traceback.format_list(traceback.extract_stack(frame)[-self.stack_depth:]))
+
+    def current_block_ms(self) -> float:
+        """How long the loop has gone without a heartbeat beyond the probe interval"""
+        return max((time.monotonic() - self._beat - self.interval) * 1000, 0.0)
+
+    @contextmanager
+    def measure(self):
+        window = BlockWindow()
+        self._windows.add(window)
+        try:
+            yield window
+        finally:
+            self._windows.discard(window)
+            # A stall that ends right before the block closes has not been probed yet
+            window.max_block_ms = max(window.max_block_ms, self.current_block_ms())
+
+    def stats(self) -> dict:
+        labels = [f"le_{edge}ms" for edge in LAG_BUCKETS_MS] + ["gt_%dms" % LAG_BUCKETS_MS[-1]]
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold_ms,
+            "samples": self.samples,
+            "mean_lag_ms": round(self.total_lag_ms / self.samples, 3) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag_ms, 3),
+            "current_block_ms": round(self.current_block_ms(), 3),
+            "lag_histogram": dict(zip(labels, self.buckets)),
+            "stalls": self.stalls,
+            "routes": {
+                route: {**counters, "blocked_ms": round(counters["blocked_ms"], 3), "max_ms": round(counters["max_ms"], 3)}
+                for route, counters in self.routes.items()
+            },
+        }
@@ -0,0 +1,151 @@
+"""On-demand memory profiling for a single running worker.
+
+tracemalloc is off by default, since tracing every allocation slows a
+worker down noticeably. An admin can start it, read top allocation sites
+and diffs between snapshots, and stop it again, all without restarting the
+worker. The overhead stays bounded:
+
+- traceback depth is capped;
+- tracing stops on its own after max_seconds;
+- only the baseline and the most recent snapshot are kept;
+- object counts, which walk every tracked object, are opt-in.
+
+Taking a snapshot and listing gc objects are single C calls that hold the
+GIL, so they still pause the event loop for their duration (tens of ms on
+a busy worker); only the Python-level grouping and diffing around them runs
+in a worker thread.
+
+gc and object-count statistics are available whether or not tracing is on.
+"""
+import asyncio
+import gc
+import os
+import resource
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional
+
+MAX_FRAMES = 25
+KEY_TYPES = ("lineno", "filename", "traceback")
+# Allocations made by the profiler itself are noise
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def format_stat(stat, key_type: str) -> dict:
+    frames = stat.traceback.format() if key_type == "traceback" else None
+    site = stat.traceback[0]
+    entry = {
+        "site": f"{site.filename}:{site.lineno}" if key_type != "filename" else site.filename,
+        "size_kb": round(stat.size / 1024, 1),
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+        entry["count_diff"] = stat.count_diff
+    if frames:
+        entry["traceback"] = frames
+    return entry
+
+
+class MemoryProfiler:
+    def __init__(self, default_max_seconds: float = 300.0):
+        self.default_max_seconds = default_max_seconds
+        self.started_at: Optional[float] = None
+        self.frames = 0
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._stop_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    async def start(self, frames: int = 1, max_seconds: Optional[float] = None) -> dict:
+        if self.tracing:
+            self.stop()
+        self.frames = max(1, min(frames, MAX_FRAMES))
+        tracemalloc.start(self.frames)
+        self.started_at = time.time()
+        self._baseline = await asyncio.to_thread(self._take_snapshot)
+        self._previous = None
+        max_seconds = max_seconds or self.default_max_seconds
+        self._stop_handle = asyncio.get_running_loop().call_later(max_seconds, self.stop)
+        return {"tracing": True, "frames": self.frames, "stops_in_s": max_seconds, "pid": os.getpid()}
+
+    def stop(self) -> dict:
+        if self._stop_handle is not None:
+            self._stop_handle.cancel()
+            self._stop_handle = None
+        was_tracing = self.tracing
+        peak = tracemalloc.get_traced_memory()[1] if was_tracing else None
+        tracemalloc.stop()
+        self._baseline = self._previous = None
+        self.started_at = None
+        return {"tracing": False, "was_tracing": was_tracing, "peak_traced_kb": round(peak / 1024, 1) if peak else None}
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def _snapshot_report(self, top: int, key_type: str, compare_to: str) -> dict:
+        snapshot = self._take_snapshot()
+        if compare_to == "previous" and self._previous is not None:
+            reference, label = self._previous, "previous"
+        else:
+            reference, label = self._baseline, "baseline"
+        self._previous = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        report = {
+            "traced_kb": round(current / 1024, 1),
+            "peak_traced_kb": round(peak / 1024, 1),
+            "overhead_kb": round(tracemalloc.get_tracemalloc_memory() / 1024, 1),
+            "top": [format_stat(stat, key_type) for stat in snapshot.statistics(key_type)[:top]],
+        }
+        if reference is not None:
+            diff = snapshot.compare_to(reference, key_type)
+            report["compared_to"] = label
+            report["growth"] = [format_stat(stat, key_type) for stat in diff[:top] if stat.size_diff > 0]
+        return report
+
+    def _object_counts(self, top: int) -> dict:
+        counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+        return {"tracked": sum(counts.values()), "top_types": dict(counts.most_common(top))}
+
+    async def report(self, top: int = 20, key_type: str = "lineno", compare_to: str = "baseline",
+                     objects: bool = False) -> dict:
+        result = {
+            "pid": os.getpid(),
+            "rss_bytes": rss_bytes(),
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "tracing": self.tracing,
+            "gc": {
+                "counts": gc.get_count(),
+                "thresholds": gc.get_threshold(),
+                "generations": gc.get_stats(),
+                "uncollectable": len(gc.garbage),
+            },
+        }
+        if objects:
+            result["objects"] = await asyncio.to_thread(self._object_counts, top)
+        if self.tracing:
+            if self.started_at is not None:
+                result["tracing_for_s"] = round(time.time() - self.started_at, 1)
+            result["frames"] = self.frames
+            try:
+                result["snapshot"] = await asyncio.to_thread(self._snapshot_report, top, key_type, compare_to)
+            except RuntimeError:
+                # Stopped (timer or another request) while the snapshot was being taken
+                result["tracing"] = False
+        return result
@@ -0,0 +1,195 @@
+"""Resume validation and text extraction.
+
+Everything here is CPU-bound and runs inside the resume worker processes
+owned by server.py (see worker_main), so this module deliberately imports
+nothing from the app.
+"""
+import base64
+import html
+import io
+import re
+import zipfile
+import zlib
+from typing import Optional, Tuple
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+MAX_TEXT_CHARS = 100_000
+# Inflation caps: a small Flate stream can expand to gigabytes (zip bomb)
+MAX_STREAM_INFLATED = 8 * 1024 * 1024
+MAX_TOTAL_INFLATED = 32 * 1024 * 1024
+MAX_DOCX_XML_BYTES = 16 * 1024 * 1024
+
+PDF_PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+# Uploads are untrusted, so a literal string may not contain an unescaped
+# parenthesis and an array may not contain a bracket: every attempt then stops
+# at the next delimiter instead of rescanning to the end of the stream
+PDF_LITERAL = rb"\([^\\()]*(?:\\.[^\\()]*)*\)"
+PDF_TEXT_RE = re.compile(rb"%s\s*Tj|\[(?:[^\[\]()]|%s)*\]\s*TJ" % (PDF_LITERAL, PDF_LITERAL), re.S)
+PDF_STRING_RE = re.compile(rb"\(([^\\()]*(?:\\.[^\\()]*)*)\)", re.S)
+PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+DOCX_PARAGRAPH_RE = re.compile(r"</w:p>")
+DOCX_TEXT_RE = re.compile(r"<w:t(?:\s[^<>]*)?>([^<]*)</w:t>")
+DOCX_PAGES_RE = re.compile(r"<Pages>(\d+)</Pages>")
+
+
+class ResumeRejected(ValueError):
+    """The upload is not an acceptable resume (wrong type, too big, too long)"""
+
+
+def detect_resume_type(content: bytes) -> str:
+    """Identify the file type from its magic bytes, ignoring the client's filename"""
+    if content.startswith(PDF_MAGIC):
+        return "application/pdf"
+    if content.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        except zipfile.BadZipFile:
+            pass
+    if content.startswith(OLE_MAGIC):
+        return "application/msword"
+    raise ResumeRejected("Resume must be a PDF or Word document")
+
+
+def _unescape_pdf_string(raw: bytes) -> bytes:
+    def replace(match):
+        escaped = match.group(1)
+        if escaped[:1].isdigit():
+            return bytes([int(escaped, 8) & 0xFF])
+        return PDF_ESCAPES.get(escaped, escaped)
+
+    return re.sub(rb"\\([0-7]{1,3}|.)", replace, raw, flags=re.S)
+
+
+def _pdf_streams(content: bytes):
+    """Yield each stream, inflated up to the per-stream cap; stop at the total cap"""
+    budget = MAX_TOTAL_INFLATED
+    pos = 0
+    while budget > 0:
+        start = content.find(b"stream", pos)
+        if start < 0:
+            return
+        pos = start + len(b"stream")
+        if content[start - 3:start] == b"end":
+            continue
+        # The keyword is followed by CRLF or LF, and endstream by an optional EOL
+        if content.startswith(b"\r\n", pos):
+            pos += 2
+        elif content.startswith(b"\n", pos):
+            pos += 1
+        else:
+            continue
+        end = content.find(b"endstream", pos)
+        if end < 0:
+            return
+        data = content[pos:end]
+        pos = end + len(b"endstream")
+        if data.endswith(b"\n"):
+            data = data[:-2] if data.endswith(b"\r\n") else data[:-1]
+        try:
+            # Anything past max_length is left unconsumed and never inflated
+            data = zlib.decompressobj().decompress(data, min(MAX_STREAM_INFLATED, budget))
+        except zlib.error:
+            pass
+        budget -= len(data)
+        yield data
+
+
+def extract_pdf(content: bytes) -> Tuple[int, str]:
+    """Best-effort page count and text for a PDF without third-party parsers.
+
+    Pages are counted across the file body and any compressed object streams;
+    text comes from literal strings shown with Tj/TJ operators.
+    """
+    pages = len(PDF_PAGE_RE.findall(content))
+    chunks = []
+    length = 0
+    for stream in _pdf_streams(content):
+        if not pages:
+            pages = len(PDF_PAGE_RE.findall(stream))
+        for operator in PDF_TEXT_RE.finditer(stream):
+            for literal in PDF_STRING_RE.findall(operator.group(0)):
+                text = _unescape_pdf_string(literal).decode("latin-1")
+                chunks.append(text)
+                length += len(text)
+            chunks.append(" ")
+        if length >= MAX_TEXT_CHARS:
+            break
+    text = re.sub(r"\s+", " ", "".join(chunks)).strip()
+    return pages, text[:MAX_TEXT_CHARS]
+
+
+def extract_docx(content: bytes) -> Tuple[Optional[int], str]:
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        for name in ("word/document.xml", "docProps/app.xml"):
+            if name in archive.namelist() and archive.getinfo(name).file_size > MAX_DOCX_XML_BYTES:
+                raise ResumeRejected("Resume file is too large to process")
+        document = archive.read("word/document.xml").decode("utf-8", errors="ignore")
+        try:
+            app_xml = archive.read("docProps/app.xml").decode("utf-8", errors="ignore")
+        except KeyError:
+            app_xml = ""
+    paragraphs = (
+        "".join(DOCX_TEXT_RE.findall(paragraph))
+        for paragraph in DOCX_PARAGRAPH_RE.split(document)
+    )
+    text = html.unescape("\n".join(p for p in paragraphs if p))
+    pages_match = DOCX_PAGES_RE.search(app_xml)
+    return (int(pages_match.group(1)) if pages_match else None), text[:MAX_TEXT_CHARS]
+
+
+def process_resume(content: bytes, filename: str, max_bytes: int, max_pages: int) -> dict:
+    """Validate a resume upload and prepare it for storage and the HR email.
+
+    Returns metadata, extracted text and the base64 attachment body, or raises
+    ResumeRejected with a message safe to show to the applicant.
+    """
+    if not content:
+        raise ResumeRejected("Resume file is empty")
+    if len(content) > max_bytes:
+        raise ResumeRejected(f"Resume must be smaller than {max_bytes // (1024 * 1024)} MB")
+
+    content_type = detect_resume_type(content)
+    pages: Optional[int] = None
+    text = ""
+    try:
+        if content_type == "application/pdf":
+            pages, text = extract_pdf(content)
+        elif content_type != "application/msword":
+            pages, text = extract_docx(content)
+    except ResumeRejected:
+        raise
+    except (zipfile.BadZipFile, KeyError, ValueError):
+        raise ResumeRejected("Resume file appears to be corrupted")
+
+    if pages is not None and pages > max_pages:
+        raise ResumeRejected(f"Resume must be at most {max_pages} pages")
+
+    return {
+        "filename": filename,
+        "content_type": content_type,
+        "size": len(content),
+        "pages": pages,
+        "text": text,
+        "base64": base64.b64encode(content).decode("ascii"),
+    }
+
+
+def worker_main(conn):
+    """Serve process_resume calls sent over a pipe until the parent closes it"""
+    while True:
+        try:
+            args = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(("ok", process_resume(*args)))
+        except ResumeRejected as e:
+            conn.send(("rejected", str(e)))
+        except Exception as e:
+            conn.send(("error", repr(e)))
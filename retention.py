@@ -0,0 +1,213 @@
+"""Retention policy: archive old submissions to compressed cold storage and restore them.
+
+Documents older than a collection's retention window are streamed out in
+batches to gzip-compressed, date-partitioned JSONL files, read back and
+checked, and only then deleted from Mongo in bulk:
+
+    python retention.py archive                 # apply every configured policy
+    python retention.py archive -c job_applications --days 180 --dry-run
+    python retention.py restore -c contact_messages --start 2024-01-01 --end 2024-03-31
+
+Documents are written as MongoDB Extended JSON so ids and dates round-trip
+exactly on restore.
+"""
+import gzip
+import hashlib
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import typer
+from bson import json_util
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+ARCHIVE_DIR = Path(os.environ.get('ARCHIVE_DIR', ROOT_DIR / 'archive'))
+
+# Days to keep in the hot collection; None disables archival. Newsletters hold
+# live subscriptions, so they are only archived when explicitly configured.
+RETENTION_DAYS: Dict[str, Optional[int]] = {
+    "contact_messages": 365,
+    "job_applications": 365,
+    "newsletters": None,
+}
+for _collection in RETENTION_DAYS:
+    _override = os.environ.get(f'RETENTION_DAYS_{_collection.upper()}')
+    if _override:
+        RETENTION_DAYS[_collection] = int(_override)
+
+app = typer.Typer(help="Archive and restore old submissions")
+
+
+def get_db():
+    client = MongoClient(os.environ['MONGO_URL'])
+    return client[os.environ['DB_NAME']]
+
+
+def partition_of(doc: dict) -> str:
+    created_at = doc.get("created_at")
+    if isinstance(created_at, datetime):
+        return created_at.date().isoformat()
+    if isinstance(created_at, str) and len(created_at) >= 10:
+        return created_at[:10]
+    return "unknown"
+
+
+def older_than(cutoff: datetime) -> dict:
+    # created_at is stored as an ISO string by the API; also accept real dates
+    return {"$or": [
+        {"created_at": {"$lt": cutoff.isoformat()}},
+        {"created_at": {"$lt": cutoff}},
+    ]}
+
+
+def write_partition(collection: str, partition: str, run_id: str, seq: int, docs: List[dict]) -> Path:
+    directory = ARCHIVE_DIR / collection / f"date={partition}"
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"part-{run_id}-{seq:05d}.jsonl.gz"
+    tmp_path = path.with_suffix(".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for doc in docs:
+            f.write(json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS))
+            f.write("\n")
+    tmp_path.rename(path)
+    return path
+
+
+def verify_partition(path: Path, expected_ids: list) -> str:
+    """Re-read an archive file and check it holds exactly the expected documents"""
+    digest = hashlib.sha256()
+    ids = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            digest.update(line.encode("utf-8"))
+            ids.append(json_util.loads(line)["_id"])
+    if ids != expected_ids:
+        raise RuntimeError(f"Archive verification failed for {path}: {len(ids)} of {len(expected_ids)} documents readable")
+    return digest.hexdigest()
+
+
+def archive_collection(db, collection: str, days: int, batch_size: int, dry_run: bool) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    query = older_than(cutoff)
+    if dry_run:
+        count = db[collection].count_documents(query)
+        typer.echo(f"{collection}: {count} documents older than {cutoff.date()} would be archived")
+        return count
+
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    manifest = ARCHIVE_DIR / collection / "manifest.jsonl"
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    archived = 0
+    seq = 0
+    cursor = db[collection].find(query).sort("_id", 1).batch_size(batch_size)
+    batch: List[dict] = []
+
+    def flush():
+        nonlocal archived, seq
+        partitions: Dict[str, List[dict]] = {}
+        for doc in batch:
+            partitions.setdefault(partition_of(doc), []).append(doc)
+        for partition, docs in partitions.items():
+            seq += 1
+            ids = [doc["_id"] for doc in docs]
+            path = write_partition(collection, partition, run_id, seq, docs)
+            checksum = verify_partition(path, ids)
+            with open(manifest, "a", encoding="utf-8") as f:
+                f.write(json_util.dumps({
+                    "file": str(path.relative_to(ARCHIVE_DIR)),
+                    "partition": partition,
+                    "documents": len(docs),
+                    "sha256": checksum,
+                    "archived_at": datetime.now(timezone.utc),
+                }) + "\n")
+            # Only delete what has been written and read back
+            result = db[collection].delete_many({"_id": {"$in": ids}})
+            archived += result.deleted_count
+        batch.clear()
+
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    typer.echo(f"{collection}: archived {archived} documents older than {cutoff.date()}")
+    return archived
+
+
+@app.command()
+def archive(
+    collection: Optional[str] = typer.Option(None, "--collection", "-c", help="Only archive this collection"),
+    days: Optional[int] = typer.Option(None, help="Override the retention window in days"),
+    batch_size: int = typer.Option(1000, help="Documents per archive batch"),
+    dry_run: bool = typer.Option(False, help="Only report how many documents would be archived"),
+):
+    """Move documents older than the retention window into archive files."""
+    if collection is not None and collection not in RETENTION_DAYS:
+        raise typer.BadParameter(f"Unknown collection: {collection}")
+    db = get_db()
+    for name in ([collection] if collection else list(RETENTION_DAYS)):
+        retention = days if days is not None else RETENTION_DAYS[name]
+        if retention is None:
+            typer.echo(f"{name}: no retention policy configured, skipping")
+            continue
+        archive_collection(db, name, retention, batch_size, dry_run)
+
+
+@app.command()
+def restore(
+    collection: str = typer.Option(..., "--collection", "-c", help="Collection to restore into"),
+    start: datetime = typer.Option(..., formats=["%Y-%m-%d"], help="First partition date to restore"),
+    end: datetime = typer.Option(..., formats=["%Y-%m-%d"], help="Last partition date to restore"),
+    batch_size: int = typer.Option(1000, help="Documents per insert batch"),
+):
+    """Load archived documents for a date range back into the hot collection."""
+    db = get_db()
+    first: date = start.date()
+    last: date = end.date()
+    restored = 0
+    skipped = 0
+
+    def insert(docs: List[dict]):
+        nonlocal restored, skipped
+        try:
+            restored += len(db[collection].insert_many(docs, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            # Documents still (or already) present keep their _id and are left alone
+            duplicates = sum(1 for err in e.details["writeErrors"] if err["code"] == 11000)
+            if duplicates != len(e.details["writeErrors"]):
+                raise
+            restored += e.details["nInserted"]
+            skipped += duplicates
+
+    for directory in sorted((ARCHIVE_DIR / collection).glob("date=*")):
+        partition = directory.name.split("=", 1)[1]
+        try:
+            day = date.fromisoformat(partition)
+        except ValueError:
+            continue
+        if not first <= day <= last:
+            continue
+        for path in sorted(directory.glob("*.jsonl.gz")):
+            docs: List[dict] = []
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    docs.append(json_util.loads(line))
+                    if len(docs) >= batch_size:
+                        insert(docs)
+                        docs = []
+            if docs:
+                insert(docs)
+
+    typer.echo(f"{collection}: restored {restored} documents ({skipped} already present)")
+
+
+if __name__ == "__main__":
+    app()
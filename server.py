@@ -1,21 +1,117 @@
-from fastapi import FastAPI, APIRouter, HTTPException, File, UploadFile, Form
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, File, UploadFile, Form, Header, Query, Request, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import HTMLResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError
 import os
+import json
 import logging
+import logging.handlers
+import queue
+import random
+from contextvars import ContextVar
+from functools import partial
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter
+from typing import Awaitable, Callable, List, NamedTuple, Optional
+from collections import OrderedDict, deque
+import asyncio
+import time
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import requests
 import base64
+import hashlib
+import hmac
+import math
+import re
+import multiprocessing
+import numpy as np
+import resume_processing
+from loop_monitor import LoopMonitor
+from memory_profiling import KEY_TYPES, MAX_FRAMES, MemoryProfiler
+from tracing import JsonLinesExporter, Tracer
+from traffic_capture import MIN_SALT_BYTES, TrafficCaptureMiddleware, sanitize_capture
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Configure logging
+# Records are handed to a background listener thread so log I/O never blocks the event loop
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request ID (runs in the calling task)"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of INFO records logged with extra={"sample": True}"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or not getattr(record, "sample", False):
+            return True
+        return random.random() < self.rate
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class PassthroughQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records unformatted; the stock prepare() formats on the calling thread"""
+
+    def prepare(self, record):
+        return record
+
+def configure_logging() -> logging.handlers.QueueListener:
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+
+    queue_handler = PassthroughQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(SamplingFilter(float(os.environ.get('LOG_SAMPLE_RATE', '0.1'))))
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [queue_handler]
+    root_logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+    # uvicorn (and gunicorn's UvicornWorker) give these their own synchronous
+    # stderr handlers and stop propagation, so route them through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        server_logger = logging.getLogger(name)
+        if server_logger.handlers:
+            server_logger.handlers = [queue_handler]
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+log_listener = configure_logging()
+logger = logging.getLogger(__name__)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
@@ -38,6 +134,7 @@ class ContactMessage(BaseModel):
     phone: Optional[str] = None
     subject: str
     message: str
+    duplicate_count: int = 0
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class ContactMessageCreate(BaseModel):
@@ -47,6 +144,12 @@ class ContactMessageCreate(BaseModel):
     subject: str
     message: str
 
+class ResumeInfo(BaseModel):
+    filename: Optional[str] = None
+    content_type: str
+    size: int
+    pages: Optional[int] = None
+
 class JobApplication(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
@@ -59,6 +162,7 @@ class JobApplication(BaseModel):
     linkedin: Optional[str] = None
     portfolio: Optional[str] = None
     cover_letter: str
+    resume: Optional[ResumeInfo] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class JobApplicationCreate(BaseModel):
@@ -76,11 +180,225 @@ class Newsletter(BaseModel):
     
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     email: str
+    status: str = "subscribed"
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class NewsletterCreate(BaseModel):
     email: str
 
+# Tracing
+tracer = Tracer(
+    service_name="nexoventlabs-backend",
+    path=Path(os.environ.get('TRACE_DIR', ROOT_DIR / 'traces')) / f"spans-{os.getpid()}.jsonl",
+    sample_rate=float(os.environ.get('TRACE_SAMPLE_RATE', '0')),
+)
+
+BREVO_SEND_URL = os.environ.get('BREVO_API_URL', 'https://api.brevo.com/v3') + '/smtp/email'
+
+def post_to_brevo(headers: dict, payload: dict, template: str) -> requests.Response:
+    with tracer.span("brevo.send", {"email.template": template}) as span:
+        response = requests.post(BREVO_SEND_URL, headers=headers, json=payload)
+        span.set_attribute("http.status_code", response.status_code)
+        return response
+
+# Batched sends
+# Brevo's messageVersions sends several related emails in one request as long
+# as they only differ in recipient and per-version fields; anything else (e.g.
+# an attachment only one recipient should get) goes out as parallel requests.
+MESSAGE_VERSION_FIELDS = {"to", "cc", "bcc", "replyTo", "subject", "htmlContent", "textContent", "params"}
+
+def brevo_headers() -> Optional[dict]:
+    api_key = os.environ.get('BREVO_API_KEY')
+    if not api_key:
+        logger.error("BREVO_API_KEY not configured")
+        return None
+    return {
+        'accept': 'application/json',
+        'api-key': api_key,
+        'content-type': 'application/json'
+    }
+
+def send_brevo_email(payload: dict, template: str) -> Optional[str]:
+    """Send one email; returns its Brevo message id, or None if it was not sent"""
+    headers = brevo_headers()
+    if headers is None:
+        return None
+    try:
+        response = post_to_brevo(headers, payload, template)
+        if response.status_code == 201:
+            logger.info("Email %s sent to %s", template, payload["to"][0]["email"], extra={"sample": True})
+            return response.json().get("messageId", "")
+        logger.error("Failed to send %s email: %s - %s", template, response.status_code, response.text)
+    except Exception as e:
+        logger.error("Error sending %s email: %s", template, e)
+    return None
+
+def build_message_versions(payloads: List[dict]) -> Optional[dict]:
+    """Merge payloads into one messageVersions request, or None if they can't share one"""
+    shared = {k: v for k, v in payloads[0].items() if k not in MESSAGE_VERSION_FIELDS}
+    for payload in payloads[1:]:
+        if {k: v for k, v in payload.items() if k not in MESSAGE_VERSION_FIELDS} != shared:
+            return None
+    # Global subject/content are required and act as defaults for the versions
+    return {
+        **shared,
+        "subject": payloads[0]["subject"],
+        "htmlContent": payloads[0]["htmlContent"],
+        "messageVersions": [
+            {k: v for k, v in payload.items() if k in MESSAGE_VERSION_FIELDS} for payload in payloads
+        ],
+    }
+
+async def send_emails(messages: List[tuple]) -> List[Optional[str]]:
+    """Send related (payload, template) pairs in as few round trips as possible.
+
+    Returns the Brevo message id of each message, in order, with None for
+    any that were not sent.
+    """
+    batch = build_message_versions([payload for payload, _ in messages]) if len(messages) > 1 else None
+    if batch is not None:
+        headers = brevo_headers()
+        if headers is None:
+            return [None] * len(messages)
+        template = "+".join(template for _, template in messages)
+        try:
+            response = await asyncio.to_thread(post_to_brevo, headers, batch, template)
+        except Exception as e:
+            logger.error("Error sending %s emails: %s", template, e)
+            return [None] * len(messages)
+        if response.status_code == 201:
+            message_ids = response.json().get("messageIds") or []
+            logger.info("Emails %s sent in one request", template, extra={"sample": True})
+            return [message_ids[i] if i < len(message_ids) else "" for i in range(len(messages))]
+        if response.status_code != 400:
+            logger.error("Failed to send %s emails: %s - %s", template, response.status_code, response.text)
+            return [None] * len(messages)
+        # Rejected outright, so nothing went out and sending one by one is safe
+        logger.warning("Brevo rejected batched %s emails, sending separately: %s", template, response.text)
+    return list(await asyncio.gather(*(
+        asyncio.to_thread(send_brevo_email, payload, template) for payload, template in messages
+    )))
+
+# Signed newsletter links
+# Unsubscribe/preference tokens carry the email and an expiry under an HMAC, so a
+# click is verified in memory with no token lookup; the resulting status changes
+# are coalesced per address and written in batches.
+NEWSLETTER_LINK_SECRET = os.environ.get('NEWSLETTER_LINK_SECRET', '').encode("utf-8")
+NEWSLETTER_LINK_TTL = int(os.environ.get('NEWSLETTER_LINK_TTL_DAYS', '365')) * 86400
+PUBLIC_API_URL = os.environ.get('PUBLIC_API_URL', 'http://localhost:8000').rstrip('/')
+NEWSLETTER_STATUSES = ("subscribed", "paused", "unsubscribed")
+FALLBACK_UNSUBSCRIBE_URL = "mailto:hello@nexoventlabs.com?subject=Unsubscribe"
+NEWSLETTER_TOKEN_RE = re.compile(r"[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+")
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def sign_newsletter_token(email: str, action: str, ttl: int = NEWSLETTER_LINK_TTL) -> str:
+    body = f"{action}:{int(time.time()) + ttl}:{email}".encode("utf-8")
+    signature = hmac.new(NEWSLETTER_LINK_SECRET, body, hashlib.sha256).digest()[:16]
+    return f"{_b64encode(body)}.{_b64encode(signature)}"
+
+def verify_newsletter_token(token: str, action: str) -> Optional[str]:
+    """Return the email a valid, unexpired token was issued for, else None"""
+    if not NEWSLETTER_LINK_SECRET or not NEWSLETTER_TOKEN_RE.fullmatch(token):
+        return None
+    try:
+        encoded_body, encoded_signature = token.split(".", 1)
+        body = _b64decode(encoded_body)
+        signature = _b64decode(encoded_signature)
+        token_action, expires, email = body.decode("utf-8").split(":", 2)
+        expires_at = int(expires)
+    except ValueError:
+        return None
+    expected = hmac.new(NEWSLETTER_LINK_SECRET, body, hashlib.sha256).digest()[:16]
+    if not hmac.compare_digest(signature, expected) or token_action != action or expires_at < time.time():
+        return None
+    return email
+
+def newsletter_links(email: str) -> dict:
+    if not NEWSLETTER_LINK_SECRET:
+        return {"unsubscribe": FALLBACK_UNSUBSCRIBE_URL, "preferences": FALLBACK_UNSUBSCRIBE_URL}
+    email = normalize_email(email)
+    return {
+        "unsubscribe": f"{PUBLIC_API_URL}/api/newsletter/unsubscribe?token={sign_newsletter_token(email, 'unsubscribe')}",
+        "preferences": f"{PUBLIC_API_URL}/api/newsletter/preferences?token={sign_newsletter_token(email, 'preferences')}",
+    }
+
+def list_unsubscribe_headers(links: dict) -> dict:
+    """RFC 8058 one-click unsubscribe headers for bulk mail"""
+    if links["unsubscribe"] == FALLBACK_UNSUBSCRIBE_URL:
+        return {"List-Unsubscribe": f"<{FALLBACK_UNSUBSCRIBE_URL}>"}
+    return {
+        "List-Unsubscribe": f"<{links['unsubscribe']}>, <{FALLBACK_UNSUBSCRIBE_URL}>",
+        "List-Unsubscribe-Post": "List-Unsubscribe=One-Click",
+    }
+
+class NewsletterStatusWriter:
+    """Coalesces status changes per address and applies them with update_many"""
+
+    def __init__(self, flush_interval: float = 1.0, max_pending: int = 100000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.received = 0
+        self.written = 0
+        self.flushes = 0
+        self._pending: dict = {}
+
+    def set_status(self, email: str, status: str) -> bool:
+        """Queue a change; repeated clicks for one address collapse to the latest"""
+        if email not in self._pending and len(self._pending) >= self.max_pending:
+            return False
+        self._pending[email] = (status, datetime.now(timezone.utc).isoformat())
+        self.received += 1
+        return True
+
+    def pending_status(self, email: str) -> Optional[str]:
+        change = self._pending.get(email)
+        return change[0] if change else None
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        groups: dict = {}
+        for email, (status, changed_at) in pending.items():
+            groups.setdefault(status, []).append((email, changed_at))
+        try:
+            for status, entries in groups.items():
+                with tracer.span("mongo.update_many", {"db.collection": "newsletters", "db.batch_size": len(entries)}):
+                    result = await db.newsletters.update_many(
+                        {"email": {"$in": [email for email, _ in entries]}},
+                        {"$set": {"status": status, "status_updated_at": max(at for _, at in entries)}},
+                    )
+                self.written += result.modified_count
+                # Written groups are done; only what is left goes back on failure
+                for email, _ in entries:
+                    del pending[email]
+        finally:
+            for email, change in pending.items():
+                self._pending.setdefault(email, change)
+            self.flushes += 1
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Failed to flush newsletter status changes: %s", e)
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "received": self.received, "written": self.written, "flushes": self.flushes}
+
+newsletter_status = NewsletterStatusWriter(
+    flush_interval=float(os.environ.get('NEWSLETTER_STATUS_FLUSH_INTERVAL', '1')),
+)
+
 # Email sending function
 def send_welcome_email(to_email: str, to_name: str = "Subscriber"):
     """Send welcome email using Brevo API"""
@@ -98,7 +416,10 @@ def send_welcome_email(to_email: str, to_name: str = "Subscriber"):
         'content-type': 'application/json'
     }
     
+    links = newsletter_links(to_email)
+
     # Professional HTML email template with logo
+    render_started = time.time_ns()
     html_content = f"""
     <!DOCTYPE html>
     <html>
@@ -273,13 +594,14 @@ def send_welcome_email(to_email: str, to_name: str = "Subscriber"):
                 </p>
                 <p style="font-size: 11px; margin-top: 20px; color: #6b7280;">
                     You're receiving this email because you subscribed to our newsletter.<br>
-                    <a href="#" style="color: #9ca3af;">Unsubscribe</a> | <a href="#" style="color: #9ca3af;">Update Preferences</a>
+                    <a href="{links['unsubscribe']}" style="color: #9ca3af;">Unsubscribe</a> | <a href="{links['preferences']}" style="color: #9ca3af;">Update Preferences</a>
                 </p>
             </div>
         </div>
     </body>
     </html>
     """
+    tracer.record("template.render", render_started, {"email.template": "welcome"})
     
     payload = {
         "sender": {
@@ -293,39 +615,30 @@ def send_welcome_email(to_email: str, to_name: str = "Subscriber"):
             }
         ],
         "subject": "Welcome to Nexovent Labs - Thank You for Subscribing! 🚀",
-        "htmlContent": html_content
+        "htmlContent": html_content,
+        "headers": list_unsubscribe_headers(links),
     }
     
     try:
-        response = requests.post('https://api.brevo.com/v3/smtp/email', headers=headers, json=payload)
+        response = post_to_brevo(headers, payload, "welcome")
         
         if response.status_code == 201:
-            logger.info(f"Welcome email sent successfully to {to_email}")
+            logger.info("Welcome email sent successfully to %s", to_email, extra={"sample": True})
             return True
         else:
-            logger.error(f"Failed to send email: {response.status_code} - {response.text}")
+            logger.error("Failed to send email: %s - %s", response.status_code, response.text)
             return False
     except Exception as e:
-        logger.error(f"Error sending email: {e}")
+        logger.error("Error sending email: %s", e)
         return False
 
-def send_contact_notification_to_admin(name: str, email: str, phone: str, subject: str, message: str):
-    """Send contact form submission notification to admin"""
-    api_key = os.environ.get('BREVO_API_KEY')
+def build_contact_notification_to_admin(name: str, email: str, phone: str, subject: str, message: str) -> dict:
+    """Brevo payload notifying the admin of a contact form submission"""
     from_email = os.environ.get('BREVO_FROM_EMAIL')
     from_name = os.environ.get('BREVO_FROM_NAME')
     admin_email = "nexoventlabs@gmail.com"
     
-    if not api_key:
-        logger.error("BREVO_API_KEY not configured")
-        return False
-    
-    headers = {
-        'accept': 'application/json',
-        'api-key': api_key,
-        'content-type': 'application/json'
-    }
-    
+    render_started = time.time_ns()
     html_content = f"""
     <!DOCTYPE html>
     <html>
@@ -436,6 +749,7 @@ def send_contact_notification_to_admin(name: str, email: str, phone: str, subjec
     </body>
     </html>
     """
+    tracer.record("template.render", render_started, {"email.template": "contact_admin"})
     
     payload = {
         "sender": {
@@ -455,36 +769,14 @@ def send_contact_notification_to_admin(name: str, email: str, phone: str, subjec
             "name": name
         }
     }
-    
-    try:
-        response = requests.post('https://api.brevo.com/v3/smtp/email', headers=headers, json=payload)
-        
-        if response.status_code == 201:
-            logger.info(f"Contact notification sent to admin for {email}")
-            return True
-        else:
-            logger.error(f"Failed to send admin notification: {response.status_code} - {response.text}")
-            return False
-    except Exception as e:
-        logger.error(f"Error sending admin notification: {e}")
-        return False
+    return payload
 
-def send_contact_confirmation_to_user(name: str, email: str, subject: str):
-    """Send confirmation email to user who submitted contact form"""
-    api_key = os.environ.get('BREVO_API_KEY')
+def build_contact_confirmation_to_user(name: str, email: str, subject: str) -> dict:
+    """Brevo payload confirming receipt to the user who submitted the contact form"""
     from_email = os.environ.get('BREVO_FROM_EMAIL')
     from_name = os.environ.get('BREVO_FROM_NAME')
     
-    if not api_key:
-        logger.error("BREVO_API_KEY not configured")
-        return False
-    
-    headers = {
-        'accept': 'application/json',
-        'api-key': api_key,
-        'content-type': 'application/json'
-    }
-    
+    render_started = time.time_ns()
     html_content = f"""
     <!DOCTYPE html>
     <html>
@@ -630,6 +922,7 @@ def send_contact_confirmation_to_user(name: str, email: str, subject: str):
     </body>
     </html>
     """
+    tracer.record("template.render", render_started, {"email.template": "contact_confirmation"})
     
     payload = {
         "sender": {
@@ -645,20 +938,876 @@ def send_contact_confirmation_to_user(name: str, email: str, subject: str):
         "subject": "Thank You for Contacting Nexovent Labs - We'll Be In Touch Soon!",
         "htmlContent": html_content
     }
-    
-    try:
-        response = requests.post('https://api.brevo.com/v3/smtp/email', headers=headers, json=payload)
-        
-        if response.status_code == 201:
-            logger.info(f"Confirmation email sent to {email}")
-            return True
+    return payload
+
+# Query result cache for admin list reads
+class QueryCache:
+    """Bounded LRU/TTL cache of serialized query results.
+
+    Concurrent misses for the same key share a single in-flight load, so N
+    dashboards polling at once cost one Mongo query instead of N.
+    """
+
+    def __init__(self, maxsize: int = 64, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._inflight: dict = {}
+        self._generation = 0
+
+    async def get_or_load(self, key: tuple, loader: Callable[[], Awaitable[bytes]]) -> bytes:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader, self._generation))
+            self._inflight[key] = task
         else:
-            logger.error(f"Failed to send confirmation: {response.status_code} - {response.text}")
+            self.coalesced += 1
+        # Shield so a disconnecting client doesn't cancel the load for the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key: tuple, loader: Callable[[], Awaitable[bytes]], generation: int) -> bytes:
+        try:
+            value = await loader()
+            # Drop results that raced with an invalidation
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    def invalidate(self, collection: Optional[str] = None):
+        """Drop cached results for one collection (or everything)"""
+        self._generation += 1
+        self.invalidations += 1
+        for key in list(self._entries):
+            if collection is None or key[0] == collection:
+                del self._entries[key]
+        for key in list(self._inflight):
+            if collection is None or key[0] == collection:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+query_cache = QueryCache(
+    maxsize=int(os.environ.get('QUERY_CACHE_SIZE', '64')),
+    ttl=float(os.environ.get('QUERY_CACHE_TTL', '5')),
+)
+
+contact_messages_adapter = TypeAdapter(List[ContactMessage])
+job_applications_adapter = TypeAdapter(List[JobApplication])
+
+async def cached_list(collection: str, adapter: TypeAdapter, limit: int) -> Response:
+    """Serve a collection listing from the query cache as pre-serialized JSON"""
+    async def load() -> bytes:
+        with tracer.span("mongo.find", {"db.collection": collection, "db.limit": limit}):
+            # resume_text (up to 100k chars each) backs the search index, not the listing
+            rows = await db[collection].find({}, {"_id": 0, "resume_text": 0}).to_list(limit)
+        return adapter.dump_json(adapter.validate_python(rows))
+
+    body = await query_cache.get_or_load((collection, limit), load)
+    return Response(content=body, media_type="application/json")
+
+CACHED_COLLECTIONS = ["contact_messages", "job_applications"]
+
+# Near-duplicate detection for contact form submissions
+SIMHASH_BANDS = 8  # 8 x 8-bit bands: any fingerprint within 7 bits shares a band
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over normalized word shingles"""
+    tokens = re.sub(r"[^a-z0-9]+", " ", text.lower()).split()
+    if len(tokens) > shingle_size:
+        shingles = {" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)}
+    else:
+        shingles = {" ".join(tokens)}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # Per-bit majority vote across shingle hashes
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes, bitorder="little").tobytes(), "little")
+
+def simhash_bands(fingerprint: int) -> List[str]:
+    return [f"{i}:{(fingerprint >> (8 * i)) & 0xFF:02x}" for i in range(SIMHASH_BANDS)]
+
+class FingerprintIndex:
+    """Bounded, expiring in-memory index of recent submission fingerprints.
+
+    Entries are banded for O(1) lookups. The index is global rather than per
+    sender, since the email field is whatever the bot typed.
+    """
+
+    def __init__(self, maxsize: int = 4096, max_distance: int = 6, ttl: float = 86400):
+        if max_distance >= SIMHASH_BANDS:
+            raise ValueError(f"max_distance must be below {SIMHASH_BANDS} for banded lookups")
+        self.maxsize = maxsize
+        self.max_distance = max_distance
+        self.ttl = ttl
+        # fingerprint -> (message_id, expires_at); insertion order is age order
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._bands: dict = {}
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        self._expire()
+        for band in simhash_bands(fingerprint):
+            for candidate in self._bands.get(band, ()):
+                if (candidate ^ fingerprint).bit_count() <= self.max_distance:
+                    return self._entries[candidate][0]
+        return None
+
+    def add(self, fingerprint: int, message_id: str, added_at: Optional[float] = None):
+        if fingerprint in self._entries:
+            return
+        self._entries[fingerprint] = (message_id, (added_at if added_at is not None else time.time()) + self.ttl)
+        for band in simhash_bands(fingerprint):
+            self._bands.setdefault(band, set()).add(fingerprint)
+        while len(self._entries) > self.maxsize:
+            self._evict_oldest()
+
+    def _expire(self):
+        now = time.time()
+        while self._entries and next(iter(self._entries.values()))[1] <= now:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        fingerprint, _ = self._entries.popitem(last=False)
+        for band in simhash_bands(fingerprint):
+            bucket = self._bands[band]
+            bucket.discard(fingerprint)
+            if not bucket:
+                del self._bands[band]
+
+    def __len__(self):
+        return len(self._entries)
+
+CONTACT_DEDUP_TTL = int(os.environ.get('CONTACT_DEDUP_TTL', '86400'))
+CONTACT_DUPLICATES_KEPT = 20
+# Other senders of a near-duplicate still get a confirmation, but only the first
+# few: a bot filling in victims' addresses can't turn a storm into a mail flood
+CONTACT_DUPLICATE_CONFIRMATIONS = int(os.environ.get('CONTACT_DUPLICATE_CONFIRMATIONS', '3'))
+contact_fingerprints = FingerprintIndex(
+    maxsize=int(os.environ.get('CONTACT_DEDUP_INDEX_SIZE', '4096')),
+    max_distance=int(os.environ.get('CONTACT_DEDUP_MAX_DISTANCE', '6')),
+    ttl=CONTACT_DEDUP_TTL,
+)
+
+async def find_duplicate_contact(fingerprint: int) -> Optional[str]:
+    """Return the id of an earlier near-identical message, checking memory then Mongo"""
+    original_id = contact_fingerprints.find(fingerprint)
+    if original_id:
+        return original_id
+    # Other workers (or this one before a restart) may have seen it
+    candidates = db.contact_fingerprints.find(
+        {
+            "bands": {"$in": simhash_bands(fingerprint)},
+            # The TTL monitor only runs once a minute
+            "created_at": {"$gt": datetime.now(timezone.utc) - timedelta(seconds=CONTACT_DEDUP_TTL)},
+        },
+        {"_id": 0, "fingerprint": 1, "message_id": 1, "created_at": 1},
+    )
+    with tracer.span("mongo.find", {"db.collection": "contact_fingerprints"}):
+        matches = await candidates.to_list(None)
+    for candidate in matches:
+        stored = int(candidate["fingerprint"], 16)
+        if (stored ^ fingerprint).bit_count() <= contact_fingerprints.max_distance:
+            created_at = candidate["created_at"].replace(tzinfo=timezone.utc)
+            contact_fingerprints.add(stored, candidate["message_id"], created_at.timestamp())
+            return candidate["message_id"]
+    return None
+
+async def remember_contact_fingerprint(fingerprint: int, message_id: str):
+    contact_fingerprints.add(fingerprint, message_id)
+    with tracer.span("mongo.insert_one", {"db.collection": "contact_fingerprints"}):
+        await db.contact_fingerprints.insert_one({
+            "fingerprint": f"{fingerprint:016x}",
+            "bands": simhash_bands(fingerprint),
+            "message_id": message_id,
+            "created_at": datetime.now(timezone.utc),
+        })
+
+# Resume processing pool
+# Parsing and encoding uploads is CPU-bound, so it runs in separate processes
+# instead of stalling every other request on this worker's event loop.
+RESUME_POOL_WORKERS = int(os.environ.get('RESUME_POOL_WORKERS', '2'))
+RESUME_QUEUE_LIMIT = int(os.environ.get('RESUME_QUEUE_LIMIT', '8'))
+RESUME_TIMEOUT = float(os.environ.get('RESUME_TIMEOUT', '20'))
+RESUME_MAX_BYTES = int(os.environ.get('RESUME_MAX_BYTES', str(10 * 1024 * 1024)))
+RESUME_MAX_PAGES = int(os.environ.get('RESUME_MAX_PAGES', '10'))
+
+class ResumeWorkerCrashed(Exception):
+    pass
+
+class ResumeWorkerError(Exception):
+    """process_resume raised something other than ResumeRejected in the worker"""
+
+class ResumeWorker:
+    def __init__(self):
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=resume_processing.worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def call(self, args: tuple):
+        """Blocking round trip; run in a thread"""
+        try:
+            self.conn.send(args)
+            return self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise ResumeWorkerCrashed(str(e))
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+class ResumeWorkerPool:
+    """Dedicated worker processes, one job each at a time.
+
+    Jobs wait for a free worker before their timeout starts, and a job that
+    overruns kills only its own worker (replaced on next use), so a stuck
+    parse never costs other applicants their place.
+    """
+
+    def __init__(self, size: int, timeout: float):
+        self.timeout = timeout
+        self.timeouts = 0
+        self.crashes = 0
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[ResumeWorker] = []
+
+    async def run(self, *args):
+        async with self._slots:
+            worker = self._idle.pop() if self._idle else await asyncio.to_thread(ResumeWorker)
+            try:
+                status, result = await asyncio.wait_for(asyncio.to_thread(worker.call, args), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                await asyncio.to_thread(worker.kill)
+                raise
+            except ResumeWorkerCrashed:
+                self.crashes += 1
+                await asyncio.to_thread(worker.kill)
+                raise
+            self._idle.append(worker)
+        if status == "rejected":
+            raise resume_processing.ResumeRejected(result)
+        if status == "error":
+            raise ResumeWorkerError(result)
+        return result
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().kill()
+
+    def stats(self) -> dict:
+        return {"idle_workers": len(self._idle), "timeouts": self.timeouts, "crashes": self.crashes}
+
+resume_pool = ResumeWorkerPool(RESUME_POOL_WORKERS, RESUME_TIMEOUT)
+resume_jobs_pending = 0
+
+async def process_resume(content: bytes, filename: Optional[str]) -> dict:
+    """Validate and extract a resume in a worker process, bounded by queue depth and time"""
+    global resume_jobs_pending
+    if resume_jobs_pending >= RESUME_QUEUE_LIMIT:
+        raise HTTPException(status_code=503, detail="Too many applications are being processed, please try again shortly")
+
+    resume_jobs_pending += 1
+    try:
+        with tracer.span("resume.process", {"upload.size": len(content)}):
+            return await resume_pool.run(content, filename, RESUME_MAX_BYTES, RESUME_MAX_PAGES)
+    except resume_processing.ResumeRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except asyncio.TimeoutError:
+        logger.error("Resume processing timed out for %s", filename)
+        raise HTTPException(status_code=503, detail="Resume could not be processed in time, please try again")
+    except ResumeWorkerCrashed:
+        logger.error("Resume worker crashed while handling %s", filename)
+        raise HTTPException(status_code=503, detail="Resume could not be processed, please try again")
+    except ResumeWorkerError as e:
+        # The parser choked on this particular file (e.g. a DOCX using an unsupported compression method)
+        logger.warning("Resume processing failed for %s: %s", filename, e)
+        raise HTTPException(status_code=400, detail="Resume file appears to be corrupted")
+    finally:
+        resume_jobs_pending -= 1
+
+# Service/careers catalog
+# Seed content for the Mongo-backed catalog; edit the `catalog` collection to change it live
+DEFAULT_CATALOGS = {
+    "services": {
+        "services": [
+            {
+                "id": "1",
+                "title": "Web Development",
+                "description": "Build stunning, responsive websites and web applications that deliver exceptional user experiences and drive business growth.",
+                "icon": "globe",
+                "features": ["Responsive Design", "Full-stack Development", "E-commerce Solutions", "Progressive Web Apps"]
+            },
+            {
+                "id": "2",
+                "title": "Mobile App Development",
+                "description": "Native and cross-platform mobile applications that deliver exceptional user experiences across all devices.",
+                "icon": "smartphone",
+                "features": ["iOS Development", "Android Development", "React Native", "Flutter Apps"]
+            },
+            {
+                "id": "3",
+                "title": "Chatbot & AI Integration",
+                "description": "Intelligent chatbots and AI-powered solutions to automate customer interactions and enhance user engagement.",
+                "icon": "messageCircle",
+                "features": ["Custom Chatbots", "NLP Integration", "Voice Assistants", "Customer Support Automation"]
+            },
+            {
+                "id": "4",
+                "title": "Machine Learning & AI Solutions",
+                "description": "Advanced machine learning models and AI systems to transform your data into actionable insights and intelligent automation.",
+                "icon": "brain",
+                "features": ["Predictive Analytics", "Computer Vision", "Deep Learning", "AI Model Training"]
+            },
+            {
+                "id": "5",
+                "title": "Database & Backend Solutions",
+                "description": "Robust database architecture and backend systems that power your applications with scalability, security, and performance.",
+                "icon": "database",
+                "features": ["Database Design", "API Development", "Cloud Infrastructure", "Performance Optimization"]
+            }
+        ]
+    },
+    "careers": {
+        "positions": [
+            {
+                "id": "1",
+                "title": "Senior Full-Stack Developer",
+                "department": "Engineering",
+                "location": "Remote / San Francisco",
+                "type": "Full-time",
+                "experience": "5+ years",
+                "description": "Lead the development of scalable web applications using modern technologies."
+            },
+            {
+                "id": "2",
+                "title": "DevOps Engineer",
+                "department": "Infrastructure",
+                "location": "Remote / New York",
+                "type": "Full-time",
+                "experience": "3+ years",
+                "description": "Build and maintain our cloud infrastructure and CI/CD pipelines."
+            },
+            {
+                "id": "3",
+                "title": "ML Engineer",
+                "department": "AI Research",
+                "location": "Remote / Boston",
+                "type": "Full-time",
+                "experience": "4+ years",
+                "description": "Develop and deploy machine learning models for production systems."
+            },
+            {
+                "id": "4",
+                "title": "UI/UX Designer",
+                "department": "Design",
+                "location": "Remote",
+                "type": "Full-time",
+                "experience": "3+ years",
+                "description": "Create beautiful and intuitive user interfaces for our products."
+            },
+            {
+                "id": "5",
+                "title": "Product Manager",
+                "department": "Product",
+                "location": "San Francisco",
+                "type": "Full-time",
+                "experience": "5+ years",
+                "description": "Drive product strategy and roadmap for our enterprise solutions."
+            }
+        ],
+        "benefits": [
+            "Competitive salary & equity",
+            "Remote-first culture",
+            "Unlimited PTO",
+            "Health, dental & vision",
+            "401(k) matching",
+            "Learning & development budget",
+            "Home office stipend",
+            "Flexible working hours"
+        ]
+    },
+}
+
+class CatalogSnapshot(NamedTuple):
+    version: str
+    body: bytes
+    updated_at: Optional[str]
+
+def build_catalog_snapshot(payload: dict, updated_at: Optional[str] = None) -> CatalogSnapshot:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return CatalogSnapshot(hashlib.sha1(body).hexdigest()[:16], body, updated_at)
+
+class CatalogStore:
+    """Immutable, pre-serialized in-memory snapshots of the catalog collection.
+
+    Requests only ever read the current snapshot; a background task swaps in a
+    new one when the stored content changes (stale-while-revalidate), so a
+    slow or unavailable database never delays a catalog read.
+    """
+
+    def __init__(self, defaults: dict, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.refreshed_at: Optional[float] = None
+        self._defaults = defaults
+        self._snapshots = {name: build_catalog_snapshot(payload) for name, payload in defaults.items()}
+        self._wakeup = asyncio.Event()
+
+    def get(self, name: str) -> CatalogSnapshot:
+        return self._snapshots[name]
+
+    def response(self, name: str, request: Request) -> Response:
+        snapshot = self._snapshots[name]
+        etag = f'"{snapshot.version}"'
+        # Revalidate every time: a matching ETag costs a 304, and edits show up on the next refresh
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+    async def seed(self):
+        """Insert the default payloads for any catalog missing from Mongo"""
+        for name, payload in self._defaults.items():
+            await db.catalog.update_one(
+                {"_id": name},
+                {"$setOnInsert": {"payload": payload, "updated_at": datetime.now(timezone.utc).isoformat()}},
+                upsert=True,
+            )
+
+    async def refresh(self):
+        snapshots = dict(self._snapshots)
+        changed = []
+        async for doc in db.catalog.find({"_id": {"$in": list(self._defaults)}}):
+            snapshot = build_catalog_snapshot(doc["payload"], doc.get("updated_at"))
+            if snapshot.version != snapshots[doc["_id"]].version:
+                snapshots[doc["_id"]] = snapshot
+                changed.append(doc["_id"])
+        # Swap the whole mapping so readers never see a half-applied refresh
+        self._snapshots = snapshots
+        self.refreshed_at = time.time()
+        if changed:
+            logger.info("Catalog snapshot updated: %s", ", ".join(changed))
+
+    def request_refresh(self):
+        self._wakeup.set()
+
+    async def run(self):
+        try:
+            await self.seed()
+        except Exception as e:
+            logger.error("Failed to seed catalog: %s", e)
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Catalog refresh failed, serving previous snapshot: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def stats(self) -> dict:
+        return {
+            "versions": {name: snapshot.version for name, snapshot in self._snapshots.items()},
+            "refreshed_at": datetime.fromtimestamp(self.refreshed_at, timezone.utc).isoformat() if self.refreshed_at else None,
+        }
+
+catalog = CatalogStore(DEFAULT_CATALOGS, refresh_interval=float(os.environ.get('CATALOG_REFRESH_INTERVAL', '10')))
+
+# Brevo delivery events
+# Webhook events are validated cheaply, buffered in memory and bulk-written,
+# so a burst of thousands of events costs a handful of Mongo round trips.
+SUPPRESSING_EVENTS = {"hard_bounce", "invalid_email", "spam"}
+EMAIL_EVENTS_TTL = int(os.environ.get('EMAIL_EVENTS_TTL', str(180 * 86400)))
+WEBHOOK_MAX_BODY = int(os.environ.get('WEBHOOK_MAX_BODY', str(5 * 1024 * 1024)))
+
+def parse_brevo_event(raw) -> Optional[dict]:
+    """Turn one Brevo webhook event into an email_events document, or None if malformed"""
+    if not isinstance(raw, dict):
+        return None
+    event = raw.get("event")
+    email = raw.get("email")
+    if not isinstance(event, str) or not isinstance(email, str) or "@" not in email:
+        return None
+    if isinstance(raw.get("ts_epoch"), (int, float)):
+        ts = datetime.fromtimestamp(raw["ts_epoch"] / 1000, timezone.utc)
+    elif isinstance(raw.get("ts_event"), (int, float)):
+        ts = datetime.fromtimestamp(raw["ts_event"], timezone.utc)
+    else:
+        ts = datetime.now(timezone.utc)
+    return {
+        "ts": ts,
+        "meta": {"event": event, "email": email.strip().lower()},
+        "message_id": raw.get("message-id"),
+        "subject": raw.get("subject"),
+        "tag": raw.get("tag"),
+        "reason": raw.get("reason"),
+    }
+
+class EmailEventBuffer:
+    """Accumulates delivery events and flushes them with insert_many in the background"""
+
+    def __init__(self, max_batch: int = 1000, flush_interval: float = 0.5, max_pending: int = 50000):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.received = 0
+        self.written = 0
+        self.rejected = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self.flushes = 0
+        self._pending: List[dict] = []
+        self._wakeup = asyncio.Event()
+
+    def add(self, events: List[dict]) -> bool:
+        """Queue events; False means we're saturated and the sender should retry"""
+        if len(self._pending) + len(events) > self.max_pending:
             return False
+        self._pending.extend(events)
+        self.received += len(events)
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+        return True
+
+    async def flush(self):
+        while self._pending:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            try:
+                with tracer.span("mongo.insert_many", {"db.collection": "email_events", "db.batch_size": len(batch)}):
+                    result = await db.email_events.insert_many(batch, ordered=False)
+                self.written += len(result.inserted_ids)
+            except BulkWriteError as e:
+                self.written += e.details.get("nInserted", 0)
+                logger.error("Some email events failed to write: %s", e.details.get("writeErrors", [])[:1])
+            except Exception:
+                # Brevo already got its 200 and won't resend: keep the batch for the next flush
+                self._pending[:0] = batch
+                overflow = len(self._pending) - self.max_pending
+                if overflow > 0:
+                    del self._pending[-overflow:]
+                    self.dropped += overflow
+                    logger.error("Email event buffer overflowed while Mongo was failing; dropped %d events", overflow)
+                raise
+            self.flushes += 1
+            await self._suppress(batch)
+
+    async def _suppress(self, batch: List[dict]):
+        """Flag newsletter subscribers whose address permanently failed"""
+        reasons = {}
+        for doc in batch:
+            if doc["meta"]["event"] in SUPPRESSING_EVENTS:
+                reasons[doc["meta"]["email"]] = doc["meta"]["event"]
+        if not reasons:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        for reason in set(reasons.values()):
+            emails = [email for email, r in reasons.items() if r == reason]
+            with tracer.span("mongo.update_many", {"db.collection": "newsletters"}):
+                result = await db.newsletters.update_many(
+                    {"email": {"$in": emails}, "suppressed": {"$ne": True}},
+                    {"$set": {"suppressed": True, "suppressed_reason": reason, "suppressed_at": now}},
+                )
+            self.suppressed += result.modified_count
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Failed to flush email events: %s", e)
+                await asyncio.sleep(1)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "written": self.written,
+            "rejected": self.rejected,
+            "suppressed": self.suppressed,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+        }
+
+email_events = EmailEventBuffer(
+    max_batch=int(os.environ.get('EMAIL_EVENTS_BATCH_SIZE', '1000')),
+    flush_interval=float(os.environ.get('EMAIL_EVENTS_FLUSH_INTERVAL', '0.5')),
+    max_pending=int(os.environ.get('EMAIL_EVENTS_MAX_PENDING', '50000')),
+)
+
+async def create_email_events_collection():
+    """Time-series collection so events are stored in time buckets, expiring after EMAIL_EVENTS_TTL"""
+    try:
+        await db.create_collection(
+            "email_events",
+            timeseries={"timeField": "ts", "metaField": "meta", "granularity": "seconds"},
+            expireAfterSeconds=EMAIL_EVENTS_TTL,
+        )
+    except CollectionInvalid:
+        pass  # already exists
     except Exception as e:
-        logger.error(f"Error sending confirmation: {e}")
+        # Servers without time-series support get a plain collection instead
+        logger.warning("Could not create time-series email_events collection: %s", e)
+    await db.email_events.create_index([("meta.email", 1), ("ts", -1)])
+    await db.email_events.create_index([("meta.event", 1), ("ts", -1)])
+    await db.email_events.create_index("message_id")
+
+# Newsletter subscriber Bloom filter
+# Definite misses skip the duplicate check entirely; likely hits are confirmed
+# against the email index. A unique index backs up the (per-worker) filter.
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Kirsch-Mitzenmacher double hashing from one 128-bit digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def false_positive_rate(self) -> float:
+        """Expected false-positive rate at the current fill"""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "memory_bytes": len(self._bits),
+            "false_positive_rate": round(self.false_positive_rate(), 6),
+        }
+
+class SubscriberFilter:
+    """Per-worker Bloom filter over normalized newsletter emails"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.ready = False
+        self.skipped_lookups = 0
+        self.confirmed_lookups = 0
+
+    async def load(self):
+        # Without the unique index a definite miss could race another worker's insert
+        await db.newsletters.create_index("email", unique=True)
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        renames = []
+        cursor = db.newsletters.find({}, {"email": 1}).batch_size(10000)
+        async for doc in cursor:
+            if not doc.get("email"):
+                continue
+            email = normalize_email(doc["email"])
+            bloom.add(email)
+            if email != doc["email"]:
+                renames.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"email": email}}))
+            if len(renames) >= 1000:
+                await self._normalize(renames)
+                renames = []
+        if renames:
+            await self._normalize(renames)
+        if bloom.count > self.capacity:
+            logger.warning("Subscriber count %s exceeds Bloom filter capacity %s", bloom.count, self.capacity)
+        self.bloom = bloom
+        self.ready = True
+        logger.info("Subscriber Bloom filter loaded with %s emails", bloom.count)
+
+    async def _normalize(self, renames: list):
+        """Store older, as-typed addresses normalized so status and suppression writes match them"""
+        try:
+            with tracer.span("mongo.bulk_write", {"db.collection": "newsletters", "db.batch_size": len(renames)}):
+                await db.newsletters.bulk_write(renames, ordered=False)
+        except BulkWriteError as e:
+            # The normalized spelling subscribed separately; that row is the one kept in sync
+            logger.warning("Left %d newsletter emails unnormalized: already subscribed normalized",
+                           len(e.details.get("writeErrors", [])))
+
+    def might_contain(self, email: str) -> bool:
+        if not self.ready or email in self.bloom:
+            self.confirmed_lookups += 1
+            return True
+        self.skipped_lookups += 1
         return False
 
+    def add(self, email: str):
+        self.bloom.add(email)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "skipped_lookups": self.skipped_lookups,
+            "confirmed_lookups": self.confirmed_lookups,
+            **self.bloom.stats(),
+        }
+
+subscriber_filter = SubscriberFilter(
+    capacity=int(os.environ.get('NEWSLETTER_BLOOM_CAPACITY', '1000000')),
+    error_rate=float(os.environ.get('NEWSLETTER_BLOOM_ERROR_RATE', '0.01')),
+)
+
+# Live submission feed
+# New submissions are pushed to admin dashboards over server-sent events instead
+# of dashboards re-polling the full lists. The feed only sees what reaches this
+# worker's hub: with several workers (the Procfile runs 4), ENABLE_CHANGE_STREAMS
+# must be on so every hub gets every insert, which also makes event ids (the
+# change's clusterTime) identical across workers. Otherwise the stream is
+# refused unless LIVE_FEED_LOCAL_ONLY=true declares a single-worker deployment.
+LIVE_FEED_EVENTS = {"contact_messages": "contact_message", "job_applications": "job_application"}
+
+def change_event_id(change: dict) -> str:
+    cluster_time = change["clusterTime"]
+    return f"ct-{cluster_time.time:010d}-{cluster_time.inc:06d}"
+
+class BroadcastHub:
+    """In-process fan-out with a replay window and bounded per-client buffers.
+
+    A client that falls more than `client_buffer` events behind is
+    disconnected rather than buffered without limit; EventSource reconnects
+    with Last-Event-ID and catches up from the history window. Ids are opaque:
+    resuming finds the last seen id in the window, which is kept in publish
+    order, so a document created earlier but inserted later is never skipped.
+    """
+
+    def __init__(self, history: int = 1000, client_buffer: int = 100):
+        self.client_buffer = client_buffer
+        self.published = 0
+        self.dropped_clients = 0
+        self._epoch = uuid.uuid4().hex[:8]
+        self._history: deque = deque(maxlen=history)
+        self._clients: set = set()
+
+    def publish(self, event: str, doc: dict, event_id: Optional[str] = None):
+        payload = {k: v for k, v in doc.items() if k not in ("_id", "resume_text")}
+        self.published += 1
+        item = (event_id or f"{self._epoch}-{self.published}", event, json.dumps(payload, default=str))
+        self._history.append(item)
+        for client in list(self._clients):
+            if client.qsize() >= self.client_buffer:
+                # The queue has one spare slot reserved for this sentinel
+                self._clients.discard(client)
+                client.put_nowait(None)
+                self.dropped_clients += 1
+            else:
+                client.put_nowait(item)
+
+    def subscribe(self, last_event_id: Optional[str]):
+        """Register a client; returns its queue and the events it missed (or None if unknown)"""
+        client: asyncio.Queue = asyncio.Queue(maxsize=self.client_buffer + 1)
+        self._clients.add(client)
+        if not last_event_id:
+            return client, []
+        for position, item in enumerate(self._history):
+            if item[0] == last_event_id:
+                return client, list(self._history)[position + 1:]
+        # Older than the window, or issued by another worker or process
+        return client, None
+
+    def unsubscribe(self, client: asyncio.Queue):
+        self._clients.discard(client)
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "published": self.published,
+            "dropped_clients": self.dropped_clients,
+            "history": len(self._history),
+        }
+
+live_feed = BroadcastHub(
+    history=int(os.environ.get('LIVE_FEED_HISTORY', '1000')),
+    client_buffer=int(os.environ.get('LIVE_FEED_CLIENT_BUFFER', '100')),
+)
+CHANGE_STREAMS_ENABLED = os.environ.get('ENABLE_CHANGE_STREAMS', 'false').lower() == 'true'
+LIVE_FEED_LOCAL_ONLY = os.environ.get('LIVE_FEED_LOCAL_ONLY', 'false').lower() == 'true'
+
+def publish_submission(collection: str, doc: dict):
+    # With change streams on, every worker (this one included) publishes from
+    # the stream instead, so each event is delivered exactly once per client
+    if not CHANGE_STREAMS_ENABLED:
+        live_feed.publish(LIVE_FEED_EVENTS[collection], doc)
+
+def format_sse(item) -> str:
+    event_id, event, data = item
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+# Event-loop lag monitor
+# Flags synchronous calls that stall every in-flight request on this worker
+loop_monitor = LoopMonitor(
+    interval=float(os.environ.get('LOOP_MONITOR_INTERVAL', '0.05')),
+    threshold_ms=float(os.environ.get('LOOP_BLOCK_THRESHOLD_MS', '100')),
+)
+
+# Admin-only diagnostics
+memory_profiler = MemoryProfiler(default_max_seconds=float(os.environ.get('MEMORY_PROFILE_MAX_SECONDS', '300')))
+
+def verify_admin_token(x_admin_token: str = Header("")):
+    expected = os.environ.get('ADMIN_TOKEN')
+    if not expected or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
 # API Routes
 @api_router.get("/")
 async def root():
@@ -666,37 +1815,77 @@ async def root():
 
 @api_router.post("/contact")
 async def create_contact_message(input: ContactMessageCreate):
-    # Send notification to admin
-    try:
-        send_contact_notification_to_admin(
-            name=input.name,
-            email=input.email,
-            phone=input.phone or "Not provided",
-            subject=input.subject,
-            message=input.message
-        )
-    except Exception as e:
-        logger.error(f"Failed to send admin notification: {e}")
-    
-    # Send confirmation to user
+    # Collapse near-duplicates (spam storms) into a counter instead of re-sending emails
+    fingerprint = simhash(f"{input.subject}\n{input.message}")
+    original_id = await find_duplicate_contact(fingerprint)
+    original = None
+    if original_id:
+        now = datetime.now(timezone.utc).isoformat()
+        with tracer.span("mongo.find_one_and_update", {"db.collection": "contact_messages"}):
+            original = await db.contact_messages.find_one_and_update(
+                {"id": original_id},
+                {
+                    "$inc": {"duplicate_count": 1},
+                    "$set": {"last_duplicate_at": now},
+                    # Keep who resubmitted, in case it was a different person or name or phone changed
+                    "$push": {"duplicates": {
+                        "$each": [{"name": input.name, "email": input.email, "phone": input.phone, "created_at": now}],
+                        "$slice": -CONTACT_DUPLICATES_KEPT,
+                    }},
+                },
+                projection={"_id": 0, "email": 1, "duplicate_count": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+    # The original may have been archived since; then this one is stored as new
+    if original:
+        query_cache.invalidate("contact_messages")
+        # The admin was notified about the original; a different sender is still told
+        # we got their message, up to a global cap per original
+        if (normalize_email(original["email"]) != normalize_email(input.email)
+                and original["duplicate_count"] <= CONTACT_DUPLICATE_CONFIRMATIONS):
+            try:
+                await send_emails([(build_contact_confirmation_to_user(
+                    name=input.name,
+                    email=input.email,
+                    subject=input.subject
+                ), "contact_confirmation")])
+            except Exception as e:
+                logger.error("Failed to send contact confirmation: %s", e)
+        return {"message": "Thank you for contacting us! We'll get back to you soon.", "success": True}
+
+    contact_obj = ContactMessage(**input.model_dump())
+    doc = contact_obj.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    with tracer.span("mongo.insert_one", {"db.collection": "contact_messages"}):
+        await db.contact_messages.insert_one(doc)
+    publish_submission("contact_messages", doc)
+    await remember_contact_fingerprint(fingerprint, contact_obj.id)
+    query_cache.invalidate("contact_messages")
+
+    # Notify the admin and confirm to the user in a single Brevo request
     try:
-        send_contact_confirmation_to_user(
-            name=input.name,
-            email=input.email,
-            subject=input.subject
-        )
+        await send_emails([
+            (build_contact_notification_to_admin(
+                name=input.name,
+                email=input.email,
+                phone=input.phone or "Not provided",
+                subject=input.subject,
+                message=input.message
+            ), "contact_admin"),
+            (build_contact_confirmation_to_user(
+                name=input.name,
+                email=input.email,
+                subject=input.subject
+            ), "contact_confirmation"),
+        ])
     except Exception as e:
-        logger.error(f"Failed to send user confirmation: {e}")
+        logger.error("Failed to send contact emails: %s", e)
     
     return {"message": "Thank you for contacting us! We'll get back to you soon.", "success": True}
 
 @api_router.get("/contact", response_model=List[ContactMessage])
-async def get_contact_messages():
-    messages = await db.contact_messages.find({}, {"_id": 0}).to_list(1000)
-    for msg in messages:
-        if isinstance(msg['created_at'], str):
-            msg['created_at'] = datetime.fromisoformat(msg['created_at'])
-    return messages
+async def get_contact_messages(limit: int = Query(1000, ge=1, le=1000)):
+    return await cached_list("contact_messages", contact_messages_adapter, limit)
 
 @api_router.post("/careers/apply")
 async def create_job_application(
@@ -710,23 +1899,40 @@ async def create_job_application(
     cover_letter: str = Form(...),
     resume: UploadFile = File(...)
 ):
+    # FastAPI has already parsed the multipart body by the time we get here
+    root_span = tracer.current_root()
+    if root_span is not None:
+        tracer.record("multipart.parse", root_span.start_ns, {"upload.size": resume.size})
+    if resume.size is not None and resume.size > RESUME_MAX_BYTES:
+        raise HTTPException(status_code=400, detail=f"Resume must be smaller than {RESUME_MAX_BYTES // (1024 * 1024)} MB")
+    processed = await process_resume(await resume.read(), resume.filename)
+
     try:
-        # Read resume file
-        resume_content = await resume.read()
-        resume_base64 = base64.b64encode(resume_content).decode('utf-8')
+        application_obj = JobApplication(
+            name=name,
+            email=email,
+            phone=phone,
+            position=position,
+            experience=experience,
+            linkedin=linkedin,
+            portfolio=portfolio,
+            cover_letter=cover_letter,
+            resume=ResumeInfo(**processed),
+        )
+        doc = application_obj.model_dump()
+        doc['created_at'] = doc['created_at'].isoformat()
+        doc['resume_text'] = processed['text']
+        with tracer.span("mongo.insert_one", {"db.collection": "job_applications"}):
+            await db.job_applications.insert_one(doc)
+        publish_submission("job_applications", doc)
+        query_cache.invalidate("job_applications")
         
         # Send email to admin with resume attachment
-        api_key = os.environ.get('BREVO_API_KEY')
         from_email = os.environ.get('BREVO_FROM_EMAIL')
         from_name = os.environ.get('BREVO_FROM_NAME')
         admin_email = "nexoventlabs@gmail.com"
         
-        headers = {
-            'accept': 'application/json',
-            'api-key': api_key,
-            'content-type': 'application/json'
-        }
-        
+        render_started = time.time_ns()
         html_content = f"""
         <!DOCTYPE html>
         <html>
@@ -782,6 +1988,7 @@ async def create_job_application(
         </body>
         </html>
         """
+        tracer.record("template.render", render_started, {"email.template": "application_hr"})
         
         payload = {
             "sender": {"name": from_name, "email": from_email},
@@ -789,18 +1996,14 @@ async def create_job_application(
             "subject": f"New Job Application: {position} - {name}",
             "htmlContent": html_content,
             "attachment": [{
-                "content": resume_base64,
+                "content": processed['base64'],
                 "name": resume.filename
             }],
             "replyTo": {"email": email, "name": name}
         }
         
-        response = requests.post('https://api.brevo.com/v3/smtp/email', headers=headers, json=payload)
-        
-        if response.status_code != 201:
-            logger.error(f"Failed to send application email: {response.status_code} - {response.text}")
-        
         # Send confirmation to applicant
+        render_started = time.time_ns()
         confirmation_html = f"""
         <!DOCTYPE html>
         <html>
@@ -846,6 +2049,7 @@ async def create_job_application(
         </body>
         </html>
         """
+        tracer.record("template.render", render_started, {"email.template": "application_confirmation"})
         
         confirmation_payload = {
             "sender": {"name": from_name, "email": from_email},
@@ -854,147 +2058,244 @@ async def create_job_application(
             "htmlContent": confirmation_html
         }
         
-        requests.post('https://api.brevo.com/v3/smtp/email', headers=headers, json=confirmation_payload)
+        # Only the HR copy carries the resume, so these go out as parallel requests
+        await send_emails([(payload, "application_hr"), (confirmation_payload, "application_confirmation")])
         
         return {"message": "Application submitted successfully! We'll be in touch soon.", "success": True}
         
     except Exception as e:
-        logger.error(f"Error processing job application: {e}")
+        logger.error("Error processing job application: %s", e)
         raise HTTPException(status_code=500, detail="Failed to submit application")
 
 @api_router.get("/careers/applications", response_model=List[JobApplication])
-async def get_job_applications():
-    applications = await db.job_applications.find({}, {"_id": 0}).to_list(1000)
-    for app in applications:
-        if isinstance(app['created_at'], str):
-            app['created_at'] = datetime.fromisoformat(app['created_at'])
-    return applications
+async def get_job_applications(limit: int = Query(1000, ge=1, le=1000)):
+    return await cached_list("job_applications", job_applications_adapter, limit)
+
+async def find_subscription(email: str, raw_email: str) -> Optional[dict]:
+    with tracer.span("mongo.find_one", {"db.collection": "newsletters"}):
+        # Rows written before the startup normalization may still use the typed spelling
+        return await db.newsletters.find_one({"email": {"$in": list({email, raw_email})}})
+
+async def resubscribe(email: str, existing: dict) -> Newsletter:
+    status = newsletter_status.pending_status(email) or existing.get("status", "subscribed")
+    if status == "subscribed":
+        raise HTTPException(status_code=400, detail="Email already subscribed")
+    # Coming back after unsubscribing or pausing: queued like any other status change
+    if not newsletter_status.set_status(email, "subscribed"):
+        raise HTTPException(status_code=503, detail="Too many pending changes, retry later")
+    try:
+        await asyncio.to_thread(send_welcome_email, email)
+    except Exception as e:
+        logger.error("Failed to send welcome email: %s", e)
+    return Newsletter(**{**existing, "status": "subscribed"})
 
 @api_router.post("/newsletter", response_model=Newsletter)
 async def subscribe_newsletter(input: NewsletterCreate):
-    existing = await db.newsletters.find_one({"email": input.email})
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already subscribed")
-    newsletter_obj = Newsletter(**input.model_dump())
+    email = normalize_email(input.email)
+    if subscriber_filter.might_contain(email):
+        existing = await find_subscription(email, input.email)
+        if existing:
+            return await resubscribe(email, existing)
+    newsletter_obj = Newsletter(email=email)
     doc = newsletter_obj.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
-    await db.newsletters.insert_one(doc)
+    try:
+        with tracer.span("mongo.insert_one", {"db.collection": "newsletters"}):
+            await db.newsletters.insert_one(doc)
+    except DuplicateKeyError:
+        # Another worker subscribed this address after our filter was built
+        subscriber_filter.add(email)
+        existing = await find_subscription(email, input.email)
+        if existing is None:
+            raise HTTPException(status_code=400, detail="Email already subscribed")
+        return await resubscribe(email, existing)
+    subscriber_filter.add(email)
     
     # Send welcome email
     try:
-        send_welcome_email(input.email)
+        await asyncio.to_thread(send_welcome_email, input.email)
     except Exception as e:
-        logger.error(f"Failed to send welcome email: {e}")
+        logger.error("Failed to send welcome email: %s", e)
         # Don't fail the subscription if email fails
     
     return newsletter_obj
 
+def newsletter_page(title: str, body: str, status_code: int = 200) -> HTMLResponse:
+    return HTMLResponse(
+        f"""<!DOCTYPE html><html><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{title} - Nexovent Labs</title></head>
+        <body style="font-family: Arial, sans-serif; max-width: 480px; margin: 60px auto; color: #1f2937;">
+        <h2 style="color: #f97316;">{title}</h2>{body}</body></html>""",
+        status_code=status_code,
+    )
+
+INVALID_LINK_PAGE = ("Link expired", "<p>This link is invalid or has expired. Use the link in a more recent email, "
+                     "or write to <a href=\"mailto:hello@nexoventlabs.com\">hello@nexoventlabs.com</a>.</p>")
+
+@api_router.get("/newsletter/unsubscribe", response_class=HTMLResponse)
+async def confirm_unsubscribe(token: str = Query("")):
+    # Mail scanners prefetch links, so GET only asks for confirmation
+    if verify_newsletter_token(token, "unsubscribe") is None:
+        return newsletter_page(*INVALID_LINK_PAGE, status_code=400)
+    return newsletter_page("Unsubscribe", f"""<p>Stop receiving the Nexovent Labs newsletter?</p>
+        <form method="post" action="?token={token}"><button type="submit">Unsubscribe</button></form>""")
+
+@api_router.post("/newsletter/unsubscribe", response_class=HTMLResponse)
+async def unsubscribe_newsletter(token: str = Query("")):
+    """Confirmation form and RFC 8058 one-click (List-Unsubscribe-Post) target"""
+    email = verify_newsletter_token(token, "unsubscribe")
+    if email is None:
+        return newsletter_page(*INVALID_LINK_PAGE, status_code=400)
+    if not newsletter_status.set_status(email, "unsubscribed"):
+        raise HTTPException(status_code=503, detail="Too many pending changes, retry later")
+    return newsletter_page("Unsubscribed", "<p>You will no longer receive our newsletter.</p>")
+
+@api_router.get("/newsletter/preferences", response_class=HTMLResponse)
+async def newsletter_preferences(token: str = Query("")):
+    if verify_newsletter_token(token, "preferences") is None:
+        return newsletter_page(*INVALID_LINK_PAGE, status_code=400)
+    labels = {"subscribed": "Keep sending me the newsletter", "paused": "Pause the newsletter for now",
+              "unsubscribed": "Unsubscribe me"}
+    options = "".join(
+        f'<p><label><input type="radio" name="status" value="{status}"{" checked" if status == "subscribed" else ""}> {labels[status]}</label></p>'
+        for status in NEWSLETTER_STATUSES
+    )
+    return newsletter_page("Newsletter preferences", f"""<form method="post" action="?token={token}">{options}
+        <button type="submit">Save preferences</button></form>""")
+
+@api_router.post("/newsletter/preferences", response_class=HTMLResponse)
+async def update_newsletter_preferences(token: str = Query(""), status: str = Form(...)):
+    email = verify_newsletter_token(token, "preferences")
+    if email is None:
+        return newsletter_page(*INVALID_LINK_PAGE, status_code=400)
+    if status not in NEWSLETTER_STATUSES:
+        raise HTTPException(status_code=400, detail="Unknown newsletter status")
+    if not newsletter_status.set_status(email, status):
+        raise HTTPException(status_code=503, detail="Too many pending changes, retry later")
+    return newsletter_page("Preferences saved", "<p>Your newsletter preferences have been updated.</p>")
+
 # Services data
 @api_router.get("/services")
-async def get_services():
-    return {
-        "services": [
-            {
-                "id": "1",
-                "title": "Web Development",
-                "description": "Build stunning, responsive websites and web applications that deliver exceptional user experiences and drive business growth.",
-                "icon": "globe",
-                "features": ["Responsive Design", "Full-stack Development", "E-commerce Solutions", "Progressive Web Apps"]
-            },
-            {
-                "id": "2",
-                "title": "Mobile App Development",
-                "description": "Native and cross-platform mobile applications that deliver exceptional user experiences across all devices.",
-                "icon": "smartphone",
-                "features": ["iOS Development", "Android Development", "React Native", "Flutter Apps"]
-            },
-            {
-                "id": "3",
-                "title": "Chatbot & AI Integration",
-                "description": "Intelligent chatbots and AI-powered solutions to automate customer interactions and enhance user engagement.",
-                "icon": "messageCircle",
-                "features": ["Custom Chatbots", "NLP Integration", "Voice Assistants", "Customer Support Automation"]
-            },
-            {
-                "id": "4",
-                "title": "Machine Learning & AI Solutions",
-                "description": "Advanced machine learning models and AI systems to transform your data into actionable insights and intelligent automation.",
-                "icon": "brain",
-                "features": ["Predictive Analytics", "Computer Vision", "Deep Learning", "AI Model Training"]
-            },
-            {
-                "id": "5",
-                "title": "Database & Backend Solutions",
-                "description": "Robust database architecture and backend systems that power your applications with scalability, security, and performance.",
-                "icon": "database",
-                "features": ["Database Design", "API Development", "Cloud Infrastructure", "Performance Optimization"]
-            }
-        ]
-    }
+async def get_services(request: Request):
+    return catalog.response("services", request)
 
 # Careers data
 @api_router.get("/careers")
-async def get_careers():
+async def get_careers(request: Request):
+    return catalog.response("careers", request)
+
+@api_router.post("/webhooks/brevo")
+async def receive_brevo_events(request: Request, token: str = Query("")):
+    expected = os.environ.get('BREVO_WEBHOOK_TOKEN')
+    if not expected or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=401, detail="Invalid webhook token")
+    try:
+        declared_length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if declared_length > WEBHOOK_MAX_BODY:
+        raise HTTPException(status_code=413, detail="Payload too large")
+
+    # Chunked bodies carry no length up front, so enforce the limit while reading
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > WEBHOOK_MAX_BODY:
+            raise HTTPException(status_code=413, detail="Payload too large")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+
+    # Brevo sends either a single event object or a batch (list) of them
+    raw_events = payload if isinstance(payload, list) else [payload]
+    events = [doc for doc in map(parse_brevo_event, raw_events) if doc is not None]
+    email_events.rejected += len(raw_events) - len(events)
+    if not email_events.add(events):
+        raise HTTPException(status_code=503, detail="Event buffer full, retry later")
+    return {"accepted": len(events), "rejected": len(raw_events) - len(events)}
+
+@api_router.get("/submissions/stream")
+async def stream_submissions(request: Request, last_event_id: Optional[str] = Query(None)):
+    # EventSource sends Last-Event-ID on reconnect; the query param covers first connects
+    if not (CHANGE_STREAMS_ENABLED or LIVE_FEED_LOCAL_ONLY):
+        raise HTTPException(
+            status_code=503,
+            detail="Live feed needs ENABLE_CHANGE_STREAMS (or LIVE_FEED_LOCAL_ONLY for a single worker)",
+        )
+    resume_from = request.headers.get("last-event-id") or last_event_id
+    client, backlog = live_feed.subscribe(resume_from)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            if backlog is None:
+                # Unknown or too old an id: the dashboard should refetch the lists
+                yield "event: reset\ndata: {}\n\n"
+            else:
+                for item in backlog:
+                    yield format_sse(item)
+            while True:
+                try:
+                    item = await asyncio.wait_for(client.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    break
+                yield format_sse(item)
+        finally:
+            live_feed.unsubscribe(client)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.get("/metrics")
+async def get_metrics():
     return {
-        "positions": [
-            {
-                "id": "1",
-                "title": "Senior Full-Stack Developer",
-                "department": "Engineering",
-                "location": "Remote / San Francisco",
-                "type": "Full-time",
-                "experience": "5+ years",
-                "description": "Lead the development of scalable web applications using modern technologies."
-            },
-            {
-                "id": "2",
-                "title": "DevOps Engineer",
-                "department": "Infrastructure",
-                "location": "Remote / New York",
-                "type": "Full-time",
-                "experience": "3+ years",
-                "description": "Build and maintain our cloud infrastructure and CI/CD pipelines."
-            },
-            {
-                "id": "3",
-                "title": "ML Engineer",
-                "department": "AI Research",
-                "location": "Remote / Boston",
-                "type": "Full-time",
-                "experience": "4+ years",
-                "description": "Develop and deploy machine learning models for production systems."
-            },
-            {
-                "id": "4",
-                "title": "UI/UX Designer",
-                "department": "Design",
-                "location": "Remote",
-                "type": "Full-time",
-                "experience": "3+ years",
-                "description": "Create beautiful and intuitive user interfaces for our products."
-            },
-            {
-                "id": "5",
-                "title": "Product Manager",
-                "department": "Product",
-                "location": "San Francisco",
-                "type": "Full-time",
-                "experience": "5+ years",
-                "description": "Drive product strategy and roadmap for our enterprise solutions."
-            }
-        ],
-        "benefits": [
-            "Competitive salary & equity",
-            "Remote-first culture",
-            "Unlimited PTO",
-            "Health, dental & vision",
-            "401(k) matching",
-            "Learning & development budget",
-            "Home office stipend",
-            "Flexible working hours"
-        ]
+        "query_cache": query_cache.stats(),
+        "catalog": catalog.stats(),
+        "email_events": email_events.stats(),
+        "newsletter_filter": subscriber_filter.stats(),
+        "live_feed": live_feed.stats(),
+        "newsletter_status": newsletter_status.stats(),
+        "resume_pool": resume_pool.stats(),
+        "event_loop": loop_monitor.stats(),
     }
 
+# Memory profiling for the worker that serves the request; with several
+# workers, repeat until the reported pid is the one being investigated
+@api_router.post("/admin/memory/start", dependencies=[Depends(verify_admin_token)])
+async def start_memory_profiling(
+    frames: int = Query(5, ge=1, le=MAX_FRAMES),
+    max_seconds: Optional[float] = Query(None, gt=0, le=3600),
+):
+    return await memory_profiler.start(frames, max_seconds)
+
+@api_router.get("/admin/memory", dependencies=[Depends(verify_admin_token)])
+async def get_memory_profile(
+    top: int = Query(20, ge=1, le=200),
+    key_type: str = Query("lineno"),
+    compare_to: str = Query("baseline"),
+    # Walks every tracked object while holding the GIL, so it is opt-in
+    objects: bool = Query(False),
+):
+    if key_type not in KEY_TYPES:
+        raise HTTPException(status_code=400, detail=f"key_type must be one of {', '.join(KEY_TYPES)}")
+    if compare_to not in ("baseline", "previous"):
+        raise HTTPException(status_code=400, detail="compare_to must be baseline or previous")
+    return await memory_profiler.report(top, key_type, compare_to, objects)
+
+@api_router.post("/admin/memory/stop", dependencies=[Depends(verify_admin_token)])
+async def stop_memory_profiling():
+    return memory_profiler.stop()
+
 # Root endpoint for health check
 @app.get("/")
 async def root():
@@ -1011,9 +2312,52 @@ async def root():
         }
     }
 
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    started = time.perf_counter()
+    try:
+        with tracer.start_trace(f"{request.method} {request.url.path}", {"http.method": request.method, "request.id": request_id}) as span:
+            response = await call_next(request)
+            route = request.scope.get("route")
+            span.set_attribute("http.route", getattr(route, "path", request.url.path))
+            span.set_attribute("http.status_code", response.status_code)
+        logger.info(
+            "%s %s %s", request.method, request.url.path, response.status_code,
+            extra={
+                "sample": True,
+                "fields": {
+                    "method": request.method,
+                    "route": getattr(route, "path", request.url.path),
+                    "status": response.status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                },
+            },
+        )
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Include the router in the main app
 app.include_router(api_router)
 
+# Optional sanitized traffic capture for the replay harness (traffic_replay.py)
+capture_exporter: Optional[JsonLinesExporter] = None
+capture_salt = os.environ.get('TRAFFIC_CAPTURE_SALT', '').encode("utf-8")
+if os.environ.get('TRAFFIC_CAPTURE_DIR') and len(capture_salt) < MIN_SALT_BYTES:
+    # Unsalted hashes of emails and phone numbers are reversible with a dictionary
+    logger.error("TRAFFIC_CAPTURE_SALT must be set (16+ random characters) to capture traffic; capture disabled")
+elif os.environ.get('TRAFFIC_CAPTURE_DIR'):
+    capture_exporter = JsonLinesExporter(
+        "traffic_capture",
+        Path(os.environ['TRAFFIC_CAPTURE_DIR']) / f"capture-{os.getpid()}.jsonl",
+        max_bytes=int(os.environ.get('TRAFFIC_CAPTURE_MAX_BYTES', str(50 * 1024 * 1024))),
+        transform=partial(sanitize_capture, salt=capture_salt),
+    )
+    app.add_middleware(TrafficCaptureMiddleware, exporter=capture_exporter)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1022,13 +2366,90 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+background_tasks: List[asyncio.Task] = []
+
+async def watch_collections():
+    """Fan in writes made by any worker (needs a replica set) to the in-memory caches"""
+    watched = CACHED_COLLECTIONS + ["catalog", "newsletters"]
+    while True:
+        try:
+            pipeline = [{"$match": {"ns.coll": {"$in": watched}}}]
+            async with db.watch(pipeline) as stream:
+                async for change in stream:
+                    collection = change["ns"]["coll"]
+                    if collection == "catalog":
+                        catalog.request_refresh()
+                    elif collection == "newsletters":
+                        if change["operationType"] == "insert" and change["fullDocument"].get("email"):
+                            subscriber_filter.add(normalize_email(change["fullDocument"]["email"]))
+                    else:
+                        query_cache.invalidate(collection)
+                        if change["operationType"] == "insert":
+                            live_feed.publish(
+                                LIVE_FEED_EVENTS[collection], change["fullDocument"], change_event_id(change)
+                            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Change stream failed: %s", e)
+            query_cache.invalidate()
+            await asyncio.sleep(5)
+
+@app.on_event("startup")
+async def create_indexes():
+    try:
+        await db.contact_fingerprints.create_index("created_at", expireAfterSeconds=CONTACT_DEDUP_TTL)
+        await db.contact_fingerprints.create_index("bands")
+        await db.contact_messages.create_index("id")
+        await db.job_applications.create_index([("resume_text", "text"), ("position", "text")])
+        await create_email_events_collection()
+    except Exception as e:
+        logger.error("Failed to create indexes: %s", e)
+
+async def load_subscriber_filter():
+    try:
+        await subscriber_filter.load()
+    except Exception as e:
+        # Stay in pass-through mode: every subscribe checks Mongo as before
+        logger.error("Failed to load subscriber Bloom filter: %s", e)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    if log_listener._thread is None:
+        # Started again in the same process (tests) after a previous shutdown
+        log_listener.start()
+    tracer.start()
+    background_tasks.append(loop_monitor.start(
+        app.routes, asyncio_debug=os.environ.get('ASYNCIO_DEBUG', 'false').lower() == 'true'
+    ))
+    if capture_exporter is not None:
+        capture_exporter.start()
+    background_tasks.append(asyncio.create_task(catalog.run()))
+    background_tasks.append(asyncio.create_task(email_events.run()))
+    background_tasks.append(asyncio.create_task(newsletter_status.run()))
+    background_tasks.append(asyncio.create_task(load_subscriber_filter()))
+    if CHANGE_STREAMS_ENABLED:
+        background_tasks.append(asyncio.create_task(watch_collections()))
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    loop_monitor.stop()
+    memory_profiler.stop()
+    try:
+        await email_events.flush()
+    except Exception as e:
+        logger.error("Failed to flush email events on shutdown: %s", e)
+    try:
+        await newsletter_status.flush()
+    except Exception as e:
+        logger.error("Failed to flush newsletter status changes on shutdown: %s", e)
     client.close()
+    resume_pool.close()
+    tracer.stop()
+    if capture_exporter is not None:
+        capture_exporter.stop()
+    log_listener.stop()
@@ -0,0 +1,663 @@
+"""Tests for server.py and its helper modules.
+
+Mongo is replaced by mongomock-motor, and Brevo by a stub that blocks like
+the real HTTPS call, so a send that slips back onto the event loop shows up
+in the loop-block budget tests.
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
+os.environ["BREVO_API_KEY"] = "test-key"
+os.environ["NEWSLETTER_LINK_SECRET"] = "link-secret"
+os.environ["BREVO_WEBHOOK_TOKEN"] = "webhook-token"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from mongomock import MongoClient as MongoMockClient  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+import analytics  # noqa: E402
+import resume_processing  # noqa: E402
+import retention  # noqa: E402
+import server  # noqa: E402
+import traffic_capture  # noqa: E402
+import traffic_replay  # noqa: E402
+
+BREVO_LATENCY = 0.2
+
+CONTACT = {
+    "name": "Ada",
+    "email": "ada@example.com",
+    "phone": "555-0100",
+    "subject": "Website quote",
+    "message": (
+        "Hello, we are a small bakery in Portland and would like a quote for a new website with online "
+        "ordering, a menu page and a contact form. We hope to launch in the spring and our budget is flexible."
+    ),
+}
+
+
+class BrevoResponse:
+    status_code = 201
+    text = ""
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+
+    def json(self):
+        versions = self.payload.get("messageVersions")
+        if versions:
+            return {"messageIds": [f"<{i}@brevo>" for i in range(len(versions))]}
+        return {"messageId": "<0@brevo>"}
+
+
+@pytest.fixture
+def brevo_posts(monkeypatch):
+    posts = []
+
+    def post(url, headers=None, json=None):
+        time.sleep(BREVO_LATENCY)
+        posts.append(json)
+        return BrevoResponse(json)
+
+    monkeypatch.setattr(server.requests, "post", post)
+    return posts
+
+
+@pytest.fixture
+def client(monkeypatch, brevo_posts):
+    mongo = AsyncMongoMockClient()
+    monkeypatch.setattr(server, "client", mongo)
+    monkeypatch.setattr(server, "db", mongo["test"])
+    monkeypatch.setattr(server, "contact_fingerprints", server.FingerprintIndex(ttl=server.CONTACT_DEDUP_TTL))
+    server.query_cache.invalidate()
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+def measure_request(test_client, method: str, path: str, **kwargs):
+    """Send a request through the app's loop and return (status, largest loop stall in ms)"""
+    async def send():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            await asyncio.sleep(2 * server.loop_monitor.interval)
+            with server.loop_monitor.measure() as window:
+                response = await http.request(method, path, **kwargs)
+                await asyncio.sleep(2 * server.loop_monitor.interval)
+        return response.status_code, window.max_block_ms
+
+    return test_client.portal.call(send)
+
+
+def test_contact_submission_stays_within_loop_block_budget(client, brevo_posts):
+    status, max_block_ms = measure_request(client, "POST", "/api/contact", json=CONTACT)
+    assert status == 200
+    assert len(brevo_posts) == 1
+    assert max_block_ms < BREVO_LATENCY * 1000 / 2
+
+
+def test_newsletter_subscribe_stays_within_loop_block_budget(client, brevo_posts):
+    status, max_block_ms = measure_request(client, "POST", "/api/newsletter", json={"email": "Ada@Example.com"})
+    assert status == 200
+    assert len(brevo_posts) == 1
+    assert max_block_ms < BREVO_LATENCY * 1000 / 2
+
+
+def test_loop_monitor_catches_a_blocking_call(client):
+    async def block():
+        await asyncio.sleep(2 * server.loop_monitor.interval)
+        with server.loop_monitor.measure() as window:
+            time.sleep(BREVO_LATENCY)
+        return window.max_block_ms
+
+    assert client.portal.call(block) >= BREVO_LATENCY * 1000 * 0.75
+
+
+def test_newsletter_tokens_sign_verify_and_expire():
+    token = server.sign_newsletter_token("ada@example.com", "unsubscribe")
+    assert server.verify_newsletter_token(token, "unsubscribe") == "ada@example.com"
+    assert server.verify_newsletter_token(token, "preferences") is None
+
+    body, signature = token.split(".")
+    flipped = bytearray(server._b64decode(signature))
+    flipped[0] ^= 0x01
+    assert server.verify_newsletter_token(f"{body}.{server._b64encode(bytes(flipped))}", "unsubscribe") is None
+    assert server.verify_newsletter_token(f'{body}"><b>.{signature}', "unsubscribe") is None
+
+    expired = server.sign_newsletter_token("ada@example.com", "unsubscribe", ttl=-1)
+    assert server.verify_newsletter_token(expired, "unsubscribe") is None
+
+
+def test_newsletter_resubscribe_when_filter_missed_the_row(client, brevo_posts):
+    # Written by another worker after this worker's Bloom filter was built
+    client.portal.call(server.db.newsletters.insert_one, {
+        "id": "sub-1", "email": "ada@example.com", "status": "unsubscribed", "created_at": "2025-01-01T00:00:00+00:00",
+    })
+    assert not server.subscriber_filter.might_contain("ada@example.com")
+
+    response = client.post("/api/newsletter", json={"email": "Ada@example.com"})
+    assert response.status_code == 200
+    assert response.json()["id"] == "sub-1" and response.json()["status"] == "subscribed"
+    assert len(brevo_posts) == 1
+
+    client.portal.call(server.newsletter_status.flush)
+    row = client.portal.call(server.db.newsletters.find_one, {"id": "sub-1"})
+    assert row["status"] == "subscribed"
+    assert client.post("/api/newsletter", json={"email": "ada@example.com"}).status_code == 400
+
+
+def test_status_changes_reach_rows_stored_unnormalized(client):
+    client.portal.call(server.db.newsletters.insert_many, [
+        {"id": "sub-1", "email": "Ada@Example.com", "status": "subscribed"},
+        {"id": "sub-2", "email": "grace@example.com", "status": "subscribed"},
+        {"id": "sub-3", "email": "Grace@Example.com", "status": "subscribed"},
+    ])
+    client.portal.call(server.subscriber_filter.load)
+
+    token = server.sign_newsletter_token("ada@example.com", "unsubscribe")
+    assert client.post("/api/newsletter/unsubscribe", params={"token": token}).status_code == 200
+    client.portal.call(server.newsletter_status.flush)
+
+    rows = client.portal.call(
+        lambda: server.db.newsletters.find({}, {"_id": 0, "id": 1, "email": 1, "status": 1}).sort("id").to_list(None)
+    )
+    assert rows == [
+        {"id": "sub-1", "email": "ada@example.com", "status": "unsubscribed"},
+        {"id": "sub-2", "email": "grace@example.com", "status": "subscribed"},
+        {"id": "sub-3", "email": "Grace@Example.com", "status": "subscribed"},
+    ]
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = server.BloomFilter(10_000, 0.01)
+    members = [f"user{i}@example.com" for i in range(10_000)]
+    for email in members:
+        bloom.add(email)
+    assert all(email in bloom for email in members)
+    false_positives = sum(f"other{i}@example.org" in bloom for i in range(10_000))
+    assert false_positives / 10_000 < 0.02
+
+
+def test_subscriber_filter_skips_lookups_for_definite_misses(client):
+    client.portal.call(server.db.newsletters.insert_one, {"id": "sub-1", "email": "ada@example.com"})
+    client.portal.call(server.subscriber_filter.load)
+    skipped = server.subscriber_filter.skipped_lookups
+
+    assert server.subscriber_filter.might_contain("ada@example.com")
+    assert not server.subscriber_filter.might_contain("grace@example.com")
+    assert server.subscriber_filter.skipped_lookups == skipped + 1
+    assert "email_1" in client.portal.call(server.db.newsletters.index_information)
+
+
+def test_brevo_webhook_ingests_fixture_and_suppresses(client):
+    events = json.loads((ROOT_DIR / "fixtures" / "brevo_events.json").read_text(encoding="utf-8"))
+    client.portal.call(server.db.newsletters.insert_many, [
+        {"email": "Bounced.User@example.org"},
+        {"email": "complainer@example.com"},
+        {"email": "subscriber@example.com"},
+    ])
+    client.portal.call(server.subscriber_filter.load)
+
+    assert client.post("/api/webhooks/brevo", params={"token": "wrong"}, json=events).status_code == 401
+    response = client.post("/api/webhooks/brevo", params={"token": "webhook-token"}, json=events)
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 8, "rejected": 2}
+
+    client.portal.call(server.email_events.flush)
+    assert client.portal.call(server.db.email_events.count_documents, {}) == 8
+    suppressed = client.portal.call(
+        lambda: server.db.newsletters.find({"suppressed": True}, {"_id": 0, "email": 1}).to_list(None)
+    )
+    assert sorted(doc["email"] for doc in suppressed) == ["bounced.user@example.org", "complainer@example.com"]
+
+
+def test_brevo_webhook_bounds_the_body(client, monkeypatch):
+    monkeypatch.setattr(server, "WEBHOOK_MAX_BODY", 1024)
+    url = "/api/webhooks/brevo?token=webhook-token"
+    event = {"event": "delivered", "email": "ada@example.com", "message-id": "<1@brevo>"}
+
+    assert client.post(url, content=b"[]", headers={"content-length": "two"}).status_code == 400
+    assert client.post(url, json=[event] * 100).status_code == 413
+
+    def chunks():
+        for _ in range(100):
+            yield json.dumps(event).encode() + b","
+
+    assert client.post(url, content=chunks()).status_code == 413
+
+
+def test_email_event_buffer_requeues_a_failed_batch(monkeypatch):
+    class FailingEvents:
+        async def insert_many(self, docs, ordered=True):
+            raise ConnectionError("mongo unavailable")
+
+    class FailingDatabase:
+        email_events = FailingEvents()
+
+    monkeypatch.setattr(server, "db", FailingDatabase())
+    buffer = server.EmailEventBuffer(max_batch=2, flush_interval=1, max_pending=3)
+    assert buffer.add([{"n": 1}, {"n": 2}, {"n": 3}])
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(buffer.flush())
+    assert buffer._pending == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert buffer.stats()["dropped"] == 0
+
+
+def test_simhash_bands_match_near_duplicates():
+    original = server.simhash(CONTACT["message"])
+    edited = server.simhash(CONTACT["message"].replace("Hello,", "HI,"))
+    unrelated = server.simhash("Please send the job description for the senior data engineer role.")
+
+    assert (original ^ edited).bit_count() <= 6
+    assert set(server.simhash_bands(original)) & set(server.simhash_bands(edited))
+
+    index = server.FingerprintIndex(maxsize=16, max_distance=6, ttl=60)
+    index.add(original, "message-1")
+    assert index.find(edited) == "message-1"
+    assert index.find(unrelated) is None
+
+
+def test_fingerprint_index_expires_and_evicts_entries():
+    index = server.FingerprintIndex(maxsize=2, max_distance=6, ttl=60)
+    index.add(1, "expired", added_at=time.time() - 61)
+    assert index.find(1) is None
+    assert len(index) == 0
+
+    for fingerprint in (0, 0x00FF00FF00FF00FF, 0xFF00FF00FF00FF00):
+        index.add(fingerprint, hex(fingerprint))
+    assert len(index) == 2
+    assert index.find(0) is None and index.find(0xFF00FF00FF00FF00) == "0xff00ff00ff00ff00"
+
+
+def test_contact_storm_across_senders_is_collapsed(client, brevo_posts):
+    assert client.post("/api/contact", json=CONTACT).status_code == 200
+    assert len(brevo_posts) == 1 and len(brevo_posts[0]["messageVersions"]) == 2
+
+    # Same sender resubmitting: nothing new goes out
+    assert client.post("/api/contact", json={**CONTACT, "message": CONTACT["message"] + " Thanks"}).status_code == 200
+    assert len(brevo_posts) == 1
+
+    # A bot rotating (or forging) the address: only a capped number of confirmations, never the admin mail
+    for i in range(server.CONTACT_DUPLICATE_CONFIRMATIONS + 3):
+        response = client.post("/api/contact", json={**CONTACT, "email": f"victim{i}@example.com"})
+        assert response.status_code == 200
+    sent = [post["to"][0]["email"] for post in brevo_posts[1:]]
+    assert sent == [f"victim{i}@example.com" for i in range(server.CONTACT_DUPLICATE_CONFIRMATIONS - 1)]
+
+    rows = client.portal.call(lambda: server.db.contact_messages.find({}, {"_id": 0}).to_list(None))
+    assert len(rows) == 1
+    assert rows[0]["duplicate_count"] == server.CONTACT_DUPLICATE_CONFIRMATIONS + 4
+    assert rows[0]["duplicates"][-1]["email"] == f"victim{server.CONTACT_DUPLICATE_CONFIRMATIONS + 2}@example.com"
+
+
+def test_contact_duplicate_of_an_archived_message_is_stored(client, brevo_posts):
+    assert client.post("/api/contact", json=CONTACT).status_code == 200
+    client.portal.call(server.db.contact_messages.delete_many, {})
+
+    assert client.post("/api/contact", json=CONTACT).status_code == 200
+    assert client.portal.call(server.db.contact_messages.count_documents, {}) == 1
+    assert len(brevo_posts) == 2
+
+
+def test_query_cache_single_flight_and_invalidation():
+    async def scenario():
+        cache = server.QueryCache(maxsize=8, ttl=60)
+        calls = 0
+        release = asyncio.Event()
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return f"v{calls}".encode()
+
+        waiters = [asyncio.ensure_future(cache.get_or_load(("contact_messages", 10), loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*waiters) == [b"v1"] * 5
+        assert calls == 1
+        assert await cache.get_or_load(("contact_messages", 10), loader) == b"v1"
+
+        cache.invalidate("contact_messages")
+        assert await cache.get_or_load(("contact_messages", 10), loader) == b"v2"
+
+        # A load that races an invalidation is returned but not cached
+        release.clear()
+        cache.invalidate()
+        racing = asyncio.ensure_future(cache.get_or_load(("contact_messages", 10), loader))
+        await asyncio.sleep(0)
+        cache.invalidate("contact_messages")
+        release.set()
+        assert await racing == b"v3"
+        assert await cache.get_or_load(("contact_messages", 10), loader) == b"v4"
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["coalesced"] == 4
+
+
+def test_admin_list_is_served_from_cache_until_a_write(client):
+    assert client.get("/api/contact").json() == []
+    assert client.post("/api/contact", json=CONTACT).status_code == 200
+    hits = server.query_cache.stats()["hits"]
+
+    rows = client.get("/api/contact").json()
+    assert [row["email"] for row in rows] == [CONTACT["email"]]
+    assert client.get("/api/contact").json() == rows
+    assert server.query_cache.stats()["hits"] == hits + 1
+
+
+def test_build_message_versions_merges_compatible_payloads():
+    admin = server.build_contact_notification_to_admin(
+        CONTACT["name"], CONTACT["email"], CONTACT["phone"], CONTACT["subject"], CONTACT["message"]
+    )
+    confirmation = server.build_contact_confirmation_to_user(CONTACT["name"], CONTACT["email"], CONTACT["subject"])
+
+    batch = server.build_message_versions([admin, confirmation])
+    assert batch is not None
+    assert [version["to"] for version in batch["messageVersions"]] == [admin["to"], confirmation["to"]]
+    assert batch["messageVersions"][0]["replyTo"] == admin["replyTo"]
+    assert "replyTo" not in batch["messageVersions"][1]
+    assert batch["subject"] == admin["subject"] and batch["sender"] == admin["sender"]
+
+    with_attachment = {**admin, "attachment": [{"content": "eA==", "name": "resume.pdf"}]}
+    assert server.build_message_versions([with_attachment, confirmation]) is None
+
+
+def test_send_emails_falls_back_to_separate_sends_when_batch_is_rejected(monkeypatch, brevo_posts):
+    def reject_batches(url, headers=None, json=None):
+        brevo_posts.append(json)
+        response = BrevoResponse(json)
+        if "messageVersions" in json:
+            response.status_code = 400
+        return response
+
+    monkeypatch.setattr(server.requests, "post", reject_batches)
+    admin = server.build_contact_notification_to_admin(
+        CONTACT["name"], CONTACT["email"], CONTACT["phone"], CONTACT["subject"], CONTACT["message"]
+    )
+    confirmation = server.build_contact_confirmation_to_user(CONTACT["name"], CONTACT["email"], CONTACT["subject"])
+
+    assert asyncio.run(server.send_emails([(admin, "contact_admin"), (confirmation, "contact_confirmation")])) == [
+        "<0@brevo>", "<0@brevo>",
+    ]
+    assert ["messageVersions" in post for post in brevo_posts] == [True, False, False]
+
+
+def pdf_with_stream(data: bytes) -> bytes:
+    return b"%PDF-1.4\n1 0 obj\n<< /Type /Page >>\nstream\n" + data + b"\nendstream\nendobj\n%%EOF\n"
+
+
+def docx_with_document(document: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def test_pdf_text_comes_from_shown_strings():
+    content = pdf_with_stream(zlib.compress(b"BT (Ada \\(Lovelace\\)) Tj [(Analytical) -250 (Engine)] TJ (hidden) Td ET"))
+    result = resume_processing.process_resume(content, "cv.pdf", 10 * 1024 * 1024, 10)
+    assert result["content_type"] == "application/pdf"
+    assert result["pages"] == 1
+    assert result["text"] == "Ada (Lovelace) AnalyticalEngine"
+
+
+@pytest.mark.parametrize("content", [
+    b"%PDF-" + b"stream\n" * 20_000,
+    pdf_with_stream(b"(" * 80_000),
+    pdf_with_stream(b"[" * 80_000),
+    pdf_with_stream(b"[" + b"(a) " * 80_000),
+    pdf_with_stream(b"(" + b"\\a" * 80_000),
+], ids=["unterminated-streams", "open-parens", "open-brackets", "unclosed-array", "unclosed-escapes"])
+def test_pdf_scanning_is_linear_on_pathological_input(content):
+    started = time.perf_counter()
+    resume_processing.process_resume(content, "cv.pdf", 10 * 1024 * 1024, 10)
+    assert time.perf_counter() - started < 1
+
+
+def test_flate_bomb_inflation_is_capped():
+    bomb = zlib.compress(b"\0" * (2 * resume_processing.MAX_STREAM_INFLATED), 9)
+    content = b"%PDF-1.4\n" + b"".join(b"stream\n" + bomb + b"\nendstream\n" for _ in range(6))
+    sizes = [len(stream) for stream in resume_processing._pdf_streams(content)]
+    assert sizes == [resume_processing.MAX_STREAM_INFLATED] * 4
+    assert sum(sizes) == resume_processing.MAX_TOTAL_INFLATED
+
+
+def test_docx_xml_inflation_is_capped():
+    content = docx_with_document(b" " * (resume_processing.MAX_DOCX_XML_BYTES + 1))
+    with pytest.raises(resume_processing.ResumeRejected):
+        resume_processing.process_resume(content, "cv.docx", 10 * 1024 * 1024, 10)
+
+
+def test_job_application_resume_outcomes(client, brevo_posts):
+    form = {
+        "name": "Ada", "email": "ada@example.com", "phone": "555-0100", "position": "Engineer",
+        "experience": "5 years", "cover_letter": "Hello",
+    }
+    # A compression method zipfile can't read fails inside the worker, not as a rejection
+    unsupported = bytearray(docx_with_document(b"<w:document/>"))
+    for header in (b"PK\x03\x04", b"PK\x01\x02"):
+        offset = unsupported.index(header) + (8 if header == b"PK\x03\x04" else 10)
+        unsupported[offset:offset + 2] = (99).to_bytes(2, "little")
+
+    cases = [
+        ("cv.pdf", pdf_with_stream(b"BT (Ada Lovelace) Tj ET"), 200),
+        ("cv.txt", b"just text", 400),
+        ("cv.docx", bytes(unsupported), 400),
+    ]
+    for filename, content, expected in cases:
+        response = client.post("/api/careers/apply", data=form, files={"resume": (filename, content)})
+        assert response.status_code == expected, (filename, response.text)
+
+    stored = client.portal.call(server.db.job_applications.find_one, {}, {"_id": 0})
+    assert stored["resume"]["pages"] == 1
+    assert stored["resume_text"] == "Ada Lovelace"
+    assert server.resume_pool.stats()["crashes"] == 0
+
+
+CAPTURE_SALT = b"capture-test-salt-0123"
+
+
+def test_capture_hashes_pii_with_the_salt_and_redacts_secrets():
+    entry = {
+        "method": "POST", "path": "/api/contact", "query": "token=secret&limit=5",
+        "content_type": "application/json", "raw_body": json.dumps(CONTACT).encode(),
+    }
+    sanitized = traffic_capture.sanitize_capture(entry, CAPTURE_SALT)
+
+    assert "raw_body" not in sanitized
+    assert sanitized["query"] == [["token", "[redacted]"], ["limit", "5"]]
+    assert CONTACT["email"] not in json.dumps(sanitized)
+    assert sanitized["body"]["email"] == traffic_capture.hash_value(CONTACT["email"], CAPTURE_SALT)
+    assert sanitized["body"]["email"] != traffic_capture.hash_value(CONTACT["email"], b"")
+    assert sanitized["body"]["message"]["len"] == len(CONTACT["message"])
+
+    with pytest.raises(ValueError):
+        traffic_capture.sanitize_capture(entry, b"")
+
+
+def test_capture_replaces_uploads_with_size_placeholders_and_replays():
+    upload = httpx.Request(
+        "POST", "http://test/api/careers/apply",
+        data={"name": "Ada", "email": "ada@example.com", "position": "Engineer"},
+        files={"resume": ("cv.pdf", b"%PDF-" + b"x" * 5000, "application/pdf")},
+    )
+    entry = {
+        "method": "POST", "path": "/api/careers/apply", "query": "",
+        "content_type": upload.headers["content-type"], "raw_body": upload.read(),
+    }
+    sanitized = traffic_capture.sanitize_capture(entry, CAPTURE_SALT)
+    assert sanitized["body_kind"] == "multipart"
+    assert sanitized["body"]["resume"] == {"__file__": {"size": 5005, "ext": ".pdf", "content_type": "application/pdf"}}
+    assert sanitized["body"]["position"] == "Engineer"
+    assert b"ada@example.com" not in json.dumps(sanitized).encode()
+
+    request = traffic_replay.build_request(json.loads(json.dumps(sanitized)), "http://replay", "token")
+    assert request["data"]["email"].endswith("@replay.test")
+    assert len(request["data"]["name"]) == 3
+    assert len(request["files"]["resume"][1]) == 5005
+
+
+def test_replay_reset_refuses_databases_not_named_replay():
+    from typer.testing import CliRunner
+
+    result = CliRunner().invoke(traffic_replay.app, ["reset-db", "--mongo-url", "mongodb://localhost:1", "--db-name", "test"])
+    assert result.exit_code == 1
+    assert "Refusing" in result.output
+
+
+def test_catalog_is_served_from_a_versioned_snapshot(client):
+    first = client.get("/api/services")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "no-cache"
+    assert first.json() == server.DEFAULT_CATALOGS["services"]
+    assert client.get("/api/services", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    edited = {**server.DEFAULT_CATALOGS["services"], "services": []}
+    client.portal.call(server.db.catalog.update_one, {"_id": "services"}, {"$set": {"payload": edited}})
+    assert client.get("/api/services").json() == server.DEFAULT_CATALOGS["services"]
+
+    client.portal.call(server.catalog.refresh)
+    second = client.get("/api/services", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.json() == edited
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_retention_archives_old_submissions_and_restores_them(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+
+    database = MongoMockClient()["test"]
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", tmp_path)
+    monkeypatch.setattr(retention, "get_db", lambda: database)
+    database.contact_messages.insert_many([
+        {"id": "old-1", "created_at": "2020-01-05T10:00:00+00:00"},
+        {"id": "old-2", "created_at": "2020-01-06T10:00:00+00:00"},
+        {"id": "new-1", "created_at": datetime.now(timezone.utc).isoformat()},
+    ])
+    runner = CliRunner()
+
+    result = runner.invoke(retention.app, ["archive", "-c", "contact_messages", "--days", "30", "--batch-size", "1"])
+    assert result.exit_code == 0, result.output
+    assert [doc["id"] for doc in database.contact_messages.find()] == ["new-1"]
+    assert sorted(p.parent.name for p in tmp_path.glob("contact_messages/date=*/*.jsonl.gz")) == [
+        "date=2020-01-05", "date=2020-01-06",
+    ]
+    manifest = (tmp_path / "contact_messages" / "manifest.jsonl").read_text().splitlines()
+    assert [json.loads(line)["documents"] for line in manifest] == [1, 1]
+
+    result = runner.invoke(retention.app, [
+        "restore", "-c", "contact_messages", "--start", "2020-01-05", "--end", "2020-01-05",
+    ])
+    assert result.exit_code == 0, result.output
+    assert sorted(doc["id"] for doc in database.contact_messages.find()) == ["new-1", "old-1"]
+
+    # Restoring again leaves documents that are already back untouched
+    result = runner.invoke(retention.app, [
+        "restore", "-c", "contact_messages", "--start", "2020-01-01", "--end", "2020-01-31",
+    ])
+    assert "restored 1 documents (1 already present)" in result.output
+
+
+def test_analytics_refetch_picks_up_late_commits_without_duplicates(tmp_path, monkeypatch):
+    database = MongoMockClient()["test"]
+    monkeypatch.setattr(analytics, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(analytics, "get_db", lambda: database)
+    database.job_applications.insert_many([
+        {"id": "a1", "position": "Engineer", "created_at": "2025-03-03T10:00:00+00:00"},
+        {"id": "a2", "position": "Designer", "created_at": "2025-03-03T10:05:00+00:00"},
+    ])
+    assert len(analytics.load_frame("job_applications", ["position"])) == 2
+
+    # Committed after the first run, but stamped before its high-water mark
+    database.job_applications.insert_many([
+        {"id": "a3", "position": "Engineer", "created_at": "2025-03-03T10:04:00+00:00"},
+        {"id": "a4", "position": "Engineer", "created_at": "2025-03-10T09:00:00+00:00"},
+    ])
+    frame = analytics.load_frame("job_applications", ["position"])
+    assert sorted(frame["id"]) == ["a1", "a2", "a3", "a4"]
+
+    report = analytics.cached_report("applications", frame, lambda df: df.groupby("position").size().to_frame("n"))
+    assert report["n"].to_dict() == {"Designer": 1, "Engineer": 3}
+    assert analytics.cached_report("applications", frame, lambda df: pytest.fail("report was not cached")) is not None
+
+
+def test_live_feed_resumes_by_publish_order():
+    async def scenario():
+        hub = server.BroadcastHub(history=10, client_buffer=2)
+        hub.publish("contact", {"id": "m1"}, event_id="ct-0000000002-000001")
+        hub.publish("contact", {"id": "m2"}, event_id="ct-0000000003-000001")
+        # Stamped earlier than m2 but published after it
+        hub.publish("contact", {"id": "m3"}, event_id="ct-0000000001-000005")
+
+        resumed_client, backlog = hub.subscribe("ct-0000000002-000001")
+        resumed = [json.loads(item[2])["id"] for item in backlog]
+        unknown_client, unknown = hub.subscribe("ct-0000000009-000001")
+        hub.unsubscribe(resumed_client)
+        hub.unsubscribe(unknown_client)
+
+        slow, _ = hub.subscribe(None)
+        for i in range(4):
+            hub.publish("contact", {"id": f"x{i}", "_id": "internal", "resume_text": "long"})
+        drained = [slow.get_nowait() for _ in range(slow.qsize())]
+        return resumed, unknown, drained, hub.stats()
+
+    resumed, unknown, drained, stats = asyncio.run(scenario())
+    assert resumed == ["m2", "m3"]
+    assert unknown is None
+    assert drained[-1] is None and len(drained) == 3
+    assert json.loads(drained[0][2]) == {"id": "x0"}
+    assert stats["dropped_clients"] == 1 and stats["clients"] == 0
+
+
+def test_live_feed_stream_needs_fan_in_or_single_worker(client, monkeypatch):
+    monkeypatch.setattr(server, "CHANGE_STREAMS_ENABLED", False)
+    monkeypatch.setattr(server, "LIVE_FEED_LOCAL_ONLY", False)
+    assert client.get("/api/submissions/stream").status_code == 503
+
+    published = server.live_feed.published
+    assert client.post("/api/contact", json=CONTACT).status_code == 200
+    assert server.live_feed.published == published + 1
+
+
+def test_memory_profiling_endpoints(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "admin-token")
+    monkeypatch.setattr(server.memory_profiler, "default_max_seconds", 42.0)
+    admin = {"X-Admin-Token": "admin-token"}
+
+    assert client.post("/api/admin/memory/start").status_code == 401
+    started = client.post("/api/admin/memory/start", params={"frames": 3}, headers=admin).json()
+    assert started["tracing"] is True and started["stops_in_s"] == 42.0
+    try:
+        kept = [bytearray(1024) for _ in range(1000)]
+        report = client.get("/api/admin/memory", params={"top": 5}, headers=admin).json()
+        assert report["tracing"] is True
+        assert "objects" not in report
+        assert len(report["snapshot"]["top"]) == 5
+        assert report["snapshot"]["compared_to"] == "baseline"
+        assert sum(entry["size_diff_kb"] for entry in report["snapshot"]["growth"]) >= 900
+
+        report = client.get("/api/admin/memory", params={"objects": True, "key_type": "filename"}, headers=admin).json()
+        assert report["objects"]["tracked"] > 0
+        assert client.get("/api/admin/memory", params={"key_type": "bogus"}, headers=admin).status_code == 400
+        del kept
+    finally:
+        stopped = client.post("/api/admin/memory/stop", headers=admin).json()
+    assert stopped["was_tracing"] is True
+    assert not server.memory_profiler.tracing
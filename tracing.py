@@ -0,0 +1,206 @@
+"""Lightweight in-process tracing with a rotating local JSON-lines exporter.
+
+Spans follow the OTLP/JSON field names (traceId, spanId, parentSpanId,
+startTimeUnixNano, ...) so exported files can be loaded by standard tooling,
+but nothing here talks to a collector: finished spans are handed to a queue
+and written to disk by a background thread (JsonLinesExporter, which the
+traffic capture middleware reuses).
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Optional[dict] = None,
+                 start_ns: Optional[int] = None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class _NoopSpan:
+    """Stand-in yielded when the current trace is not sampled"""
+
+    def set_attribute(self, key: str, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _DictQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as-is so all encoding happens on the exporter thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def __init__(self, transform=None):
+        super().__init__()
+        self.transform = transform
+
+    def format(self, record):
+        # RotatingFileHandler formats once to check for rollover and again to
+        # write, so keep the first result
+        line = getattr(record, "json_line", None)
+        if line is None:
+            entry = record.msg
+            if self.transform is not None:
+                entry = self.transform(entry)
+            line = record.json_line = json.dumps(entry, default=str)
+        return line
+
+
+class JsonLinesExporter:
+    """Writes dicts as JSON lines to a rotating file from a background thread.
+
+    ``transform`` runs on that thread too, so expensive per-entry work (like
+    sanitizing captured bodies) never happens on the caller's event loop.
+    """
+
+    def __init__(self, name: str, path: Path, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 transform=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.transform = transform
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._logger = logging.getLogger(name)
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+
+    @property
+    def running(self) -> bool:
+        return self._listener is not None
+
+    def start(self):
+        if self._listener is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8"
+        )
+        file_handler.setFormatter(_JsonLineFormatter(self.transform))
+        self._logger.handlers = [_DictQueueHandler(self._queue)]
+        self._listener = logging.handlers.QueueListener(self._queue, file_handler)
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def export(self, entry):
+        if self._listener is not None:
+            self._logger.info(entry)
+
+
+class Tracer:
+    def __init__(self, service_name: str, path: Path, sample_rate: float,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        self.service_name = service_name
+        self.sample_rate = sample_rate
+        self._current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+        self._root: ContextVar[Optional[Span]] = ContextVar("root_span", default=None)
+        self._exporter = JsonLinesExporter(f"{__name__}.exporter", path, max_bytes, backup_count)
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def start(self):
+        """Start the background exporter thread (no-op when sampling is off)"""
+        if self.enabled:
+            self._exporter.start()
+
+    def stop(self):
+        self._exporter.stop()
+
+    def current_root(self) -> Optional[Span]:
+        return self._root.get()
+
+    @contextmanager
+    def start_trace(self, name: str, attributes: Optional[dict] = None):
+        """Open a root span, deciding once per trace whether it is sampled"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield NOOP_SPAN
+            return
+        span = Span(name, os.urandom(16).hex(), None, attributes)
+        root_token = self._root.set(span)
+        current_token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            self._current.reset(current_token)
+            self._root.reset(root_token)
+            self._finish(span)
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[dict] = None):
+        """Open a child of the current span; free when the trace isn't sampled"""
+        parent = self._current.get()
+        if parent is None:
+            yield NOOP_SPAN
+            return
+        span = Span(name, parent.trace_id, parent.span_id, attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            self._current.reset(token)
+            self._finish(span)
+
+    def record(self, name: str, start_ns: int, attributes: Optional[dict] = None):
+        """Record an already-finished child span, for code that can't be wrapped in a block"""
+        parent = self._current.get()
+        if parent is None:
+            return
+        self._finish(Span(name, parent.trace_id, parent.span_id, attributes, start_ns=start_ns))
+
+    def _finish(self, span: Span):
+        span.end_ns = time.time_ns()
+        if not self._exporter.running:
+            return
+        entry = span.to_dict()
+        entry["resource"] = {"service.name": self.service_name, "process.pid": os.getpid()}
+        self._exporter.export(entry)
@@ -0,0 +1,165 @@
+"""Optional capture of sanitized production traffic for replay.
+
+When TRAFFIC_CAPTURE_DIR and TRAFFIC_CAPTURE_SALT (a secret of 16+ random
+characters, kept out of the capture files) are both set, server.py installs
+TrafficCaptureMiddleware, which records each request's route, timing and body
+to rotating JSON-lines files. Raw bodies are handed to the exporter thread untouched; parsing and
+sanitizing happen there, off the event loop:
+
+- PII fields (names, emails, phones, free text) become salted hashes plus
+  their length, so replays keep realistic sizes and duplicate patterns;
+- uploaded files become size placeholders;
+- secrets in the query string are redacted.
+
+traffic_replay.py turns these files back into requests.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from tracing import JsonLinesExporter
+
+PII_FIELDS = {
+    "name", "email", "phone", "subject", "message", "cover_letter",
+    "linkedin", "portfolio", "reason", "link", "sending_ip",
+}
+SECRET_PARAMS = {"token"}
+MIN_SALT_BYTES = 16
+
+
+def hash_value(value: str, salt: bytes) -> dict:
+    digest = hashlib.sha256(salt + value.encode("utf-8")).hexdigest()[:16]
+    return {"__pii__": digest, "len": len(value)}
+
+
+def sanitize(value, salt: bytes, key: Optional[str] = None):
+    if isinstance(value, dict):
+        return {k: sanitize(v, salt, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v, salt, key) for v in value]
+    if isinstance(value, str) and key in PII_FIELDS:
+        return hash_value(value, salt)
+    return value
+
+
+def parse_multipart(body: bytes, boundary: bytes, salt: bytes) -> dict:
+    """Minimal multipart/form-data split: field values and file sizes only"""
+    fields = {}
+    for part in body.split(b"--" + boundary)[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, content = part.lstrip(b"\r\n").partition(b"\r\n\r\n")
+        if content.endswith(b"\r\n"):
+            content = content[:-2]
+        disposition = {}
+        content_type = None
+        for line in head.decode("utf-8", errors="replace").split("\r\n"):
+            header, _, rest = line.partition(":")
+            if header.lower() == "content-disposition":
+                for item in rest.split(";")[1:]:
+                    k, _, v = item.strip().partition("=")
+                    disposition[k] = v.strip('"')
+            elif header.lower() == "content-type":
+                content_type = rest.strip()
+        name = disposition.get("name")
+        if not name:
+            continue
+        if "filename" in disposition:
+            fields[name] = {"__file__": {
+                "size": len(content),
+                "ext": os.path.splitext(disposition["filename"])[1].lower(),
+                "content_type": content_type,
+            }}
+        else:
+            fields[name] = sanitize(content.decode("utf-8", errors="replace"), salt, name)
+    return fields
+
+
+def sanitize_capture(entry: dict, salt: bytes) -> dict:
+    """Exporter-thread transform: replace the raw body with a sanitized one.
+
+    The salt is passed in by the caller rather than read from the environment
+    at import time, which would run before server.py loads .env.
+    """
+    if len(salt) < MIN_SALT_BYTES:
+        raise ValueError(f"capture salt must be at least {MIN_SALT_BYTES} bytes")
+    entry = dict(entry)
+    raw = entry.pop("raw_body", b"")
+    content_type = entry.get("content_type") or ""
+    entry["query"] = [
+        [k, "[redacted]" if k in SECRET_PARAMS else v]
+        for k, v in parse_qsl(entry.get("query") or "", keep_blank_values=True)
+    ]
+    if not raw:
+        entry["body_kind"], entry["body"] = "none", None
+    elif entry.get("body_truncated"):
+        entry["body_kind"], entry["body"] = "raw", None
+    elif content_type.startswith("application/json"):
+        try:
+            entry["body_kind"], entry["body"] = "json", sanitize(json.loads(raw), salt)
+        except ValueError:
+            entry["body_kind"], entry["body"] = "raw", None
+    elif content_type.startswith("multipart/form-data") and "boundary=" in content_type:
+        boundary = content_type.split("boundary=", 1)[1].split(";")[0].strip('"').encode("latin-1")
+        entry["body_kind"], entry["body"] = "multipart", parse_multipart(raw, boundary, salt)
+    else:
+        entry["body_kind"], entry["body"] = "raw", None
+    return entry
+
+
+class TrafficCaptureMiddleware:
+    """Pure ASGI middleware that tees request bodies as the app consumes them"""
+
+    def __init__(self, app, exporter: JsonLinesExporter, max_body: int = 16 * 1024 * 1024):
+        self.app = app
+        self.exporter = exporter
+        self.max_body = max_body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        body_size = 0
+        status = None
+        started = time.time()
+        perf_started = time.perf_counter()
+
+        async def capture_receive():
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                if body_size + len(body) <= self.max_body:
+                    chunks.append(body)
+                body_size += len(body)
+            return message
+
+        async def capture_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            headers = dict(scope.get("headers") or [])
+            route = scope.get("route")
+            self.exporter.export({
+                "ts": started,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", scope["path"]),
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "content_type": headers.get(b"content-type", b"").decode("latin-1"),
+                "status": status,
+                "duration_ms": round((time.perf_counter() - perf_started) * 1000, 3),
+                "body_size": body_size,
+                "body_truncated": body_size > self.max_body,
+                "raw_body": b"".join(chunks),
+            })
@@ -0,0 +1,245 @@
+"""Replay captured production traffic against a local instance and compare builds.
+
+Capture on a production worker by setting TRAFFIC_CAPTURE_DIR, then locally:
+
+    export MONGO_URL=mongodb://localhost:27017 DB_NAME=replay
+    python traffic_replay.py stub-brevo --port 8025 &
+    python traffic_replay.py reset-db
+    BREVO_API_URL=http://localhost:8025/v3 BREVO_API_KEY=stub uvicorn server:app &
+    python traffic_replay.py run captures/ --speed 0 --output before.json
+    # ...stop the server, switch builds...
+    python traffic_replay.py reset-db
+    BREVO_API_URL=http://localhost:8025/v3 BREVO_API_KEY=stub uvicorn server:app &
+    python traffic_replay.py run captures/ --speed 0 --output after.json
+    python traffic_replay.py compare before.json after.json
+
+Brevo is replaced by the stub server below and Mongo by a disposable local
+database, so replays never send email or touch production data. Reset the
+database before starting each server: otherwise the second run finds the
+first run's submissions and answers with dedup hits and duplicate-key 400s,
+which skews the comparison.
+"""
+import hashlib
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+import typer
+from pymongo import MongoClient
+
+app = typer.Typer(help="Replay captured traffic and compare per-route latency")
+
+WORDS = [
+    "project", "website", "mobile", "app", "quote", "budget", "timeline", "design",
+    "team", "support", "launch", "platform", "data", "cloud", "please", "contact",
+]
+
+
+def synthetic_text(digest: str, length: int, key: Optional[str]) -> str:
+    """Deterministic stand-in for a hashed value: equal inputs replay as equal text"""
+    if key == "email":
+        return f"r{digest}@replay.test"
+    if key == "phone":
+        return str(int(digest, 16))[:max(length, 1)]
+    seed = int(digest, 16)
+    words = []
+    size = 0
+    while size < length:
+        word = WORDS[seed % len(WORDS)]
+        seed = seed // len(WORDS) or int(hashlib.sha256(f"{digest}{size}".encode()).hexdigest(), 16)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:max(length, 1)]
+
+
+def synthetic_pdf(size: int) -> bytes:
+    head = b"%PDF-1.4\n1 0 obj<</Type /Page>>endobj\n"
+    tail = b"\n%%EOF"
+    return head + b"0" * max(size - len(head) - len(tail), 0) + tail
+
+
+def restore(value, key: Optional[str] = None):
+    if isinstance(value, dict):
+        if "__pii__" in value:
+            return synthetic_text(value["__pii__"], value.get("len", 8), key)
+        return {k: restore(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [restore(v, key) for v in value]
+    return value
+
+
+def build_request(record: dict, base_url: str, webhook_token: str) -> dict:
+    params = [(k, webhook_token if v == "[redacted]" else v) for k, v in record.get("query", [])]
+    request = {"method": record["method"], "url": base_url.rstrip("/") + record["path"], "params": params}
+    kind = record.get("body_kind")
+    if kind == "json":
+        request["json"] = restore(record["body"])
+    elif kind == "multipart":
+        data, files = {}, {}
+        for name, value in record["body"].items():
+            if isinstance(value, dict) and "__file__" in value:
+                meta = value["__file__"]
+                files[name] = (f"resume{meta.get('ext') or '.pdf'}", synthetic_pdf(meta["size"]), meta.get("content_type"))
+            else:
+                data[name] = restore(value, name)
+        request["data"], request["files"] = data, files
+    elif kind == "raw" and record.get("body_size"):
+        request["data"] = b"\0" * record["body_size"]
+        request["headers"] = {"content-type": record.get("content_type") or "application/octet-stream"}
+    return request
+
+
+def load_records(capture: Path) -> List[dict]:
+    paths = sorted(capture.glob("capture-*.jsonl*")) if capture.is_dir() else [capture]
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+def summarize(results: List[tuple]) -> Dict[str, dict]:
+    by_route: Dict[str, list] = {}
+    errors: Dict[str, int] = {}
+    for route, status, latency_ms in results:
+        by_route.setdefault(route, []).append(latency_ms)
+        if status is None or status >= 500:
+            errors[route] = errors.get(route, 0) + 1
+    summary = {}
+    for route, latencies in by_route.items():
+        values = np.asarray(latencies)
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        summary[route] = {
+            "requests": int(values.size),
+            "errors": errors.get(route, 0),
+            "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+        }
+    return summary
+
+
+@app.command()
+def run(
+    capture: Path = typer.Argument(..., help="Capture directory or a single capture file"),
+    base_url: str = typer.Option("http://localhost:8000", help="Instance to replay against"),
+    speed: float = typer.Option(1.0, help="1 = real time, N = N times faster, 0 = as fast as possible"),
+    concurrency: int = typer.Option(16, help="Maximum requests in flight"),
+    webhook_token: str = typer.Option("", envvar="BREVO_WEBHOOK_TOKEN", help="Substituted for redacted tokens"),
+    output: Optional[Path] = typer.Option(None, help="Write the per-route summary to this JSON file"),
+):
+    """Re-issue captured requests and report per-route latency."""
+    records = load_records(capture)
+    if not records:
+        typer.echo(f"No captured requests in {capture}")
+        raise typer.Exit(1)
+
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def issue(record: dict) -> tuple:
+        request = build_request(record, base_url, webhook_token)
+        started = time.perf_counter()
+        try:
+            status = session.request(timeout=60, **request).status_code
+        except requests.RequestException:
+            status = None
+        return record.get("route") or record["path"], status, (time.perf_counter() - started) * 1000
+
+    first_ts = records[0]["ts"]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        for record in records:
+            if speed > 0:
+                delay = (record["ts"] - first_ts) / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(pool.submit(issue, record))
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(results)
+    report = {"requests": len(results), "elapsed_s": round(elapsed, 3), "speed": speed, "routes": summary}
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    typer.echo(f"Replayed {len(results)} requests in {elapsed:.2f}s")
+    for route, stats in sorted(summary.items()):
+        typer.echo(f"  {route:<32} n={stats['requests']:<6} p50={stats['p50_ms']:>9.2f}ms "
+                   f"p95={stats['p95_ms']:>9.2f}ms p99={stats['p99_ms']:>9.2f}ms errors={stats['errors']}")
+
+
+@app.command()
+def compare(
+    baseline: Path = typer.Argument(..., help="Summary JSON from the baseline build"),
+    candidate: Path = typer.Argument(..., help="Summary JSON from the candidate build"),
+):
+    """Show per-route latency deltas between two replay summaries."""
+    before = json.loads(baseline.read_text(encoding="utf-8"))["routes"]
+    after = json.loads(candidate.read_text(encoding="utf-8"))["routes"]
+    typer.echo(f"{'route':<32} {'metric':<7} {'baseline':>10} {'candidate':>10} {'delta':>10} {'change':>8}")
+    for route in sorted(set(before) & set(after)):
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            old, new = before[route][metric], after[route][metric]
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            typer.echo(f"{route:<32} {metric[:-3]:<7} {old:>10.2f} {new:>10.2f} {new - old:>+10.2f} {change:>8}")
+    for route in sorted(set(before) ^ set(after)):
+        typer.echo(f"{route:<32} only in {'baseline' if route in before else 'candidate'}")
+
+
+@app.command("reset-db")
+def reset_db(
+    mongo_url: str = typer.Option(..., envvar="MONGO_URL", help="Replay MongoDB"),
+    db_name: str = typer.Option("replay", envvar="DB_NAME", help="Replay database to drop"),
+    force: bool = typer.Option(False, help="Allow a database whose name does not start with 'replay'"),
+):
+    """Drop the replay database so each build starts from the same empty state."""
+    if not db_name.startswith("replay") and not force:
+        typer.echo(f"Refusing to drop {db_name!r}: replay databases should be named replay*, or pass --force")
+        raise typer.Exit(1)
+    MongoClient(mongo_url).drop_database(db_name)
+    typer.echo(f"Dropped {db_name}")
+
+
+@app.command("stub-brevo")
+def stub_brevo(
+    port: int = typer.Option(8025, help="Port to listen on"),
+    latency_ms: float = typer.Option(0.0, help="Artificial latency per send, to mimic Brevo"),
+):
+    """Serve a stand-in for the Brevo send API that accepts every message."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("content-length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            versions = payload.get("messageVersions")
+            if versions:
+                body = {"messageIds": [f"<{uuid.uuid4().hex}@replay.test>" for _ in versions]}
+            else:
+                body = {"messageId": f"<{uuid.uuid4().hex}@replay.test>"}
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(201)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    typer.echo(f"Stub Brevo listening on http://localhost:{port}/v3")
+    ThreadingHTTPServer(("", port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    app()